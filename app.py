@@ -1,61 +1,59 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, send_file
 from flask_cors import CORS
 import tempfile
 import json
-from werkzeug.utils import secure_filename
 import os
-import uuid
-from datetime import datetime
-import whisper
-
-model = whisper.load_model("base")
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Import your existing modules
-from utils.tools import get_intent, execute_command
-from utils.utils import transcribe_audio, convert_to_audio
-from db.db import read, create, update, delete, filters, sort, replicate, close_connections
+from utils.tools import get_intent, execute_command, explain_command, stream_command, intent_cache, intent_router, intent_batcher, page_size
+from utils.models import Action, DBCommand
+from utils.fast_intent import fast_path_stats
+from utils.intent_cache import normalize_command
+from utils.utils import transcribe_audio, transcribe_with_stats, convert_to_audio, warm_up_models
+from utils.utils import NoSpeechDetected, vad_stats
+from utils.scheduler import SchedulerSaturated, scheduler_from_env
+from utils.streaming import registry_from_env, StreamTooLarge
+from utils.tts import get_speech
+from db.db import read, create, update, delete, filters, sort, replicate, search, next_cursor
+from db.db import create_many, update_fields, update_many, delete_many, replicate_many, PRODUCT_FIELDS, result_cache
 
 app = Flask(__name__)
 CORS(app)  # Enable Cross-Origin Resource Sharing for frontend
 
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-UPLOAD_FOLDER = 'temp_audio'
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Create upload folder if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Transcriptions run on a fixed pool of inference threads fed by a bounded queue
+# (TRANSCRIBE_WORKERS, TRANSCRIBE_MAX_QUEUE), never on the request thread
+TRANSCRIBE_TIMEOUT = float(os.getenv("TRANSCRIBE_TIMEOUT", "60"))
+transcription_scheduler = scheduler_from_env(warm_up=warm_up_models)
+
+# Load the Whisper model at boot instead of on the first transcription
+# (set WHISPER_PRELOAD=0 to keep it lazy, e.g. for text-only workers)
+if os.getenv("WHISPER_PRELOAD", "1") == "1":
+    transcription_scheduler.start()
 
 # Allowed audio file extensions
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'flac', 'ogg', 'webm', 'm4a'}
 
-# Cleanup database connections on app teardown
-@app.teardown_appcontext
-def cleanup_db(error):
-    """Clean up database connections"""
-    try:
-        close_connections()
-    except:
-        pass
-
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def cleanup_old_files():
-    """Remove temporary audio files older than 1 hour"""
-    try:
-        current_time = datetime.now().timestamp()
-        for filename in os.listdir(UPLOAD_FOLDER):
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            if os.path.isfile(filepath):
-                file_time = os.path.getctime(filepath)
-                if current_time - file_time > 3600:  # 1 hour
-                    os.remove(filepath)
-    except Exception as e:
-        print(f"Cleanup error: {e}")
+def busy_response(status_code, retry_after):
+    """429/503 response telling the client when to retry"""
+    response = jsonify({
+        "success": False,
+        "error": "Transcription service is busy, please retry shortly.",
+        "retry_after": retry_after
+    })
+    response.status_code = status_code
+    response.headers["Retry-After"] = str(retry_after)
+    return response
 
 @app.route('/')
 def index():
@@ -66,6 +64,21 @@ def index():
 def health_check():
     """Simple health check endpoint"""
     return jsonify({"status": "healthy", "message": "Flask backend is running"})
+
+@app.route('/api/metrics')
+def metrics():
+    """Runtime metrics (transcription queue depth, wait times, ...)"""
+    return jsonify({
+        "transcription": transcription_scheduler.metrics(),
+        "vad": vad_stats(),
+        "intent_cache": intent_cache.stats(),
+        "fast_intent": fast_path_stats(),
+        "intent_providers": intent_router.stats(),
+        "intent_batching": intent_batcher.stats(),
+        "result_cache": result_cache.stats(),
+        "speculative_intent": dict(speculation_stats),
+        "tts": get_speech().stats()
+    })
     
 
 @app.route("/api/transcribe", methods=["POST"])
@@ -78,35 +91,190 @@ def transcribe():
     if recording.filename == "":
         return jsonify({"success": False, "error": "No selected file."}), 400
 
-    filepath = None # Initialize filepath to None
     try:
-        # 1. Generate a unique, secure filename
-        original_filename = secure_filename(recording.filename)
-        file_extension = os.path.splitext(original_filename)[1] # Get the original extension (e.g., .webm)
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], unique_filename)
-        
-        # 2. Save the file
-        recording.save(filepath)
-        print(f"File saved temporarily to: {filepath}")
+        # 1. Read the upload into memory; it is decoded through an ffmpeg pipe
+        #    on the inference pool, without touching the disk
+        audio = recording.read()
+        if not audio:
+            return jsonify({"success": False, "error": "Empty audio file."}), 400
 
-        # 3. Transcribe the audio (with error handling)
-        # Note: You need to implement your own robust error handling for transcribe_audio
-        transcription = transcribe_audio(filepath) 
+        # 2. Queue the transcription on the inference pool and wait for it
+        #    (silence is trimmed first; clips without speech are rejected)
+        job = transcription_scheduler.submit(transcribe_with_stats, audio)
+        try:
+            transcription, cost = job.result(timeout=TRANSCRIBE_TIMEOUT)
+        except FutureTimeoutError:
+            job.cancel()
+            return busy_response(503, transcription_scheduler.retry_after())
         
-        return jsonify({"success": True, "transcription": transcription})
+        return jsonify({"success": True, "transcription": transcription, "cost": cost})
+
+    except NoSpeechDetected as e:
+        return jsonify({"success": False, "error": str(e)}), 422
+
+    except SchedulerSaturated as e:
+        return busy_response(429, e.retry_after)
 
     except Exception as e:
         # Catch errors from transcription or other issues
         print(f"An error occurred during transcription: {e}")
         return jsonify({"success": False, "error": "Could not process audio."}), 500
 
-    finally:
-        # 4. CRITICAL: Clean up the temporary file
-        if filepath and os.path.exists(filepath):
-            os.remove(filepath)
-            print(f"Temporary file deleted: {filepath}")
+
+# Intents parsed ahead of time from stable partial transcripts (see /api/voice)
+intent_pool = ThreadPoolExecutor(max_workers=int(os.getenv("INTENT_WORKERS", "4")),
+                                 thread_name_prefix="intent")
+
+def speculate_intent(text):
+    return intent_pool.submit(get_intent, text)
+
+# Streaming sessions: chunks are posted while recording, partial transcripts
+# come back with each chunk and the final transcript when the stream ends
+stream_sessions = registry_from_env(transcribe_audio, transcription_scheduler.submit,
+                                    speculate=speculate_intent)
+
+@app.route("/api/transcribe/stream", methods=["POST"])
+def open_transcription_stream():
+    """Start a streaming transcription session"""
+    return jsonify({"success": True, "session_id": stream_sessions.open()})
+
+@app.route("/api/transcribe/stream/<session_id>", methods=["POST"])
+def append_transcription_stream(session_id):
+    """Append an audio chunk (raw body or 'audio_chunk' file) and get the partial transcript"""
+    chunk = request.files["audio_chunk"].read() if "audio_chunk" in request.files else request.get_data()
+    if not chunk:
+        return jsonify({"success": False, "error": "Empty audio chunk"}), 400
+    try:
+        partial = stream_sessions.append(session_id, chunk)
+    except KeyError:
+        return jsonify({"success": False, "error": "Unknown or expired stream"}), 404
+    except StreamTooLarge as e:
+        return jsonify({"success": False, "error": str(e)}), 413
+    return jsonify({"success": True, "partial": partial, "final": False})
+
+@app.route("/api/transcribe/stream/<session_id>/end", methods=["POST"])
+def end_transcription_stream(session_id):
+    """Close the stream and return the final transcript"""
+    try:
+        transcription = stream_sessions.finish(session_id, timeout=TRANSCRIBE_TIMEOUT)
+        return jsonify({"success": True, "transcription": transcription, "final": True})
+    except KeyError:
+        return jsonify({"success": False, "error": "Unknown or expired stream"}), 404
+    except SchedulerSaturated as e:
+        return busy_response(429, e.retry_after)
+    except FutureTimeoutError:
+        return busy_response(503, transcription_scheduler.retry_after())
+    except Exception as e:
+        print(f"An error occurred during stream transcription: {e}")
+        return jsonify({"success": False, "error": "Could not process audio."}), 500
 		
+# How often the intent parsed from a stable partial matched the final transcript
+_speculation_lock = threading.Lock()
+speculation_stats = {"hits": 0, "misses": 0}
+
+def resolve_intent(transcription, speculation=None):
+    """
+    DBCommand for the final transcript, reusing the intent parsed from a
+    stable partial when it says the same thing.
+    Returns (db_command, speculative_hit).
+    """
+    if speculation is not None:
+        text, future = speculation
+        if normalize_command(text) == normalize_command(transcription):
+            try:
+                db_command = future.result(timeout=TRANSCRIBE_TIMEOUT)
+                with _speculation_lock:
+                    speculation_stats["hits"] += 1
+                return db_command, True
+            except Exception as e:
+                print(f"Speculative intent failed, parsing again: {e}")
+        else:
+            future.cancel()
+        with _speculation_lock:
+            speculation_stats["misses"] += 1
+    return get_intent(transcription), False
+
+@app.route("/api/voice", methods=["POST"])
+def voice():
+    """
+    Voice command in one request: transcribe → intent → execute → format_response
+    - audio_recording: the recorded clip, or
+    - session_id: a streaming session (/api/transcribe/stream) to finish
+    """
+    session_id = request.form.get("session_id") or request.args.get("session_id")
+    try:
+        speculation = None
+        cost = None
+        if session_id:
+            try:
+                transcription, speculation = stream_sessions.finish_session(session_id, timeout=TRANSCRIBE_TIMEOUT)
+            except KeyError:
+                return jsonify({"success": False, "error": "Unknown or expired stream"}), 404
+        else:
+            recording = request.files.get("audio_recording")
+            if recording is None or recording.filename == "":
+                return jsonify({"success": False, "error": "No audio file provided"}), 400
+            audio = recording.read()
+            if not audio:
+                return jsonify({"success": False, "error": "Empty audio file."}), 400
+            job = transcription_scheduler.submit(transcribe_with_stats, audio)
+            try:
+                transcription, cost = job.result(timeout=TRANSCRIBE_TIMEOUT)
+            except FutureTimeoutError:
+                job.cancel()
+                return busy_response(503, transcription_scheduler.retry_after())
+        
+        transcription = transcription.strip()
+        if not transcription:
+            return jsonify({"success": False, "error": "No speech detected in the recording"}), 422
+        
+        db_command, speculative_hit = resolve_intent(transcription, speculation)
+        result = execute_command(db_command)
+        response_data = format_response(result, transcription)
+        response_data["success"] = True
+        response_data["transcription"] = transcription
+        response_data["speculative_intent"] = speculative_hit
+        if cost is not None:
+            response_data["cost"] = cost
+        # Text for /api/speak, so the client can play the answer back
+        response_data["spoken_response"] = format_response_text(result, transcription)
+        return jsonify(response_data)
+
+    except NoSpeechDetected as e:
+        return jsonify({"success": False, "error": str(e)}), 422
+    except SchedulerSaturated as e:
+        return busy_response(429, e.retry_after)
+    except FutureTimeoutError:
+        return busy_response(503, transcription_scheduler.retry_after())
+    except Exception as e:
+        print(f"❌ Error in voice: {str(e)}")
+        return jsonify({"success": False, "error": f"Voice command failed: {str(e)}"}), 500
+
+@app.route("/api/speak", methods=["GET", "POST"])
+def speak():
+    """
+    Spoken audio for a text, streamed from the TTS cache
+    - text: what to say (query string or JSON body)
+    - lang / voice: optional language and backend voice
+    """
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+    else:
+        data = request.args
+    text = (data.get("text") or "").strip()
+    if not text:
+        return jsonify({"success": False, "error": "No text provided"}), 400
+    try:
+        path, mimetype, hit = get_speech().speak(text, data.get("lang") or "en", data.get("voice"))
+        response = send_file(path, mimetype=mimetype, conditional=True, max_age=86400)
+        response.headers["X-TTS-Cache"] = "hit" if hit else "miss"
+        return response
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error in speak: {str(e)}")
+        return jsonify({"success": False, "error": "Could not synthesize speech."}), 503
+
 @app.route("/api/chat", methods=["POST"])	
 def chat():
     """Process text-based commands"""
@@ -115,12 +283,11 @@ def chat():
         if not data or "message" not in data:
             return jsonify({"success": False, "error": "No message provided"})
         
-        user_message = data["message"]
-        db_command = get_intent(user_message)
-        
-        result = execute_command(db_command)
-        response_data = format_response(result, user_message)
-        return jsonify(response_data)
+        db_command = get_intent(data["message"])
+        body, mimetype = chat_result(data, db_command)
+        if mimetype:
+            return Response(body, mimetype=mimetype)
+        return jsonify(body)
     except Exception as e:
         print(f"❌ Error in chat: {str(e)}")
         return jsonify({
@@ -129,7 +296,109 @@ def chat():
         })
     
 
+@app.route("/api/explain", methods=["POST"])
+def explain():
+    """Show the query plan a text command would use (index or full scan)"""
+    data = request.get_json()
+    if not data or "message" not in data:
+        return jsonify({"status": "error", "message": "No message provided"}), 400
+    try:
+        db_command = get_intent(data["message"])
+        plan = explain_command(db_command)
+        plan["command"] = db_command.model_dump(mode="json")
+        return jsonify(plan)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    
+
 ##****************************************************************************************
+@app.route('/api/products', methods=['GET'])
+def list_products():
+    """
+    List products one page at a time
+    - limit: page size
+    - cursor: next_cursor from the previous page
+    - sort / order: sort field and asc|desc (default: id order)
+    - field / operator / value: optional filter
+    """
+    try:
+        limit = page_size(request.args.get('limit'))
+        after = request.args.get('cursor') or None
+        sort_field = request.args.get('sort')
+        field = request.args.get('field')
+        
+        if field:
+            operator = request.args.get('operator', '=')
+            products = filters(field, operator, request.args.get('value'), limit=limit, after=after)
+            cursor_field = 'id'
+        elif sort_field:
+            descending = request.args.get('order', 'asc').lower() == 'desc'
+            products = sort(sort_field, descending, limit=limit, after=after)
+            cursor_field = sort_field
+        else:
+            products = read(limit=limit, after=after)
+            cursor_field = 'id'
+        
+        return jsonify({
+            "status": "success",
+            "data": [format_product(p) for p in products],
+            "next_cursor": next_cursor(products, limit, cursor_field)
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/products/export', methods=['GET'])
+def export_products():
+    """
+    Stream every matching product (no paging), in constant memory
+    - format: ndjson (default) or json
+    - sort / order, field / operator / value: as for GET /api/products
+    """
+    try:
+        sort_field = request.args.get('sort')
+        field = request.args.get('field')
+        if field:
+            db_command = DBCommand(action=Action.filters, field=field,
+                                   operator=request.args.get('operator', '='),
+                                   value=request.args.get('value'))
+        elif sort_field:
+            db_command = DBCommand(action=Action.sort, field=sort_field,
+                                   value=request.args.get('order', 'asc'))
+        else:
+            db_command = DBCommand(action=Action.read)
+        
+        batches = stream_command(db_command)
+        if batches is None:
+            return jsonify({"status": "error", "message": "Nothing to export"}), 400
+        return stream_response(batches, request.args.get('format', 'ndjson'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/products/search', methods=['GET'])
+def search_products():
+    """
+    Ranked full-text search over name, category and color
+    - q: search text
+    - limit: maximum number of results
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"status": "error", "message": "No search text provided"}), 400
+    try:
+        products = search(query, limit=page_size(request.args.get('limit')))
+        return jsonify({
+            "status": "success",
+            "data": [format_product(p) for p in products]
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/api/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """Get specific product by ID"""
@@ -178,10 +447,11 @@ def update_product(product_id):
         if not data:
             return jsonify({"status": "error", "message": "No data provided"}), 400
         
-        # Update each field provided
-        for field, value in data.items():
-            if field in ['name', 'category', 'color', 'quantity', 'price']:
-                update(product_id, field, value)
+        # All provided fields in one UPDATE
+        fields = {field: value for field, value in data.items() if field in PRODUCT_FIELDS}
+        if not fields:
+            return jsonify({"status": "error", "message": f"No updatable fields: {PRODUCT_FIELDS}"}), 400
+        update_fields(product_id, fields)
         
         return jsonify({
             "status": "success",
@@ -203,7 +473,89 @@ def delete_product(product_id):
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Bulk endpoints: each request is a single transaction (all rows or none)
+@app.route('/api/products/bulk', methods=['POST'])
+def create_products():
+    """Create products: {"products": [{name, category, color, quantity, price}, ...]}"""
+    try:
+        data = request.get_json()
+        products = data.get('products') if data else None
+        if not products or not isinstance(products, list):
+            return jsonify({"status": "error", "message": "'products' must be a non-empty list"}), 400
+        
+        product_ids = create_many(products)
+        return jsonify({
+            "status": "success",
+            "message": f"{len(product_ids)} products created",
+            "ids": product_ids
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/products/bulk', methods=['PUT'])
+def update_products():
+    """Update products: {"updates": [{"id": 1, "price": 9.99, ...}, ...]}"""
+    try:
+        data = request.get_json()
+        updates = data.get('updates') if data else None
+        if not updates or not isinstance(updates, list):
+            return jsonify({"status": "error", "message": "'updates' must be a non-empty list"}), 400
+        if not all(isinstance(u, dict) and 'id' in u for u in updates):
+            return jsonify({"status": "error", "message": "Every update needs an 'id'"}), 400
+        
+        updated = update_many([
+            (u['id'], {field: value for field, value in u.items() if field != 'id'})
+            for u in updates
+        ])
+        return jsonify({
+            "status": "success",
+            "message": f"{updated} products updated successfully"
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/products/bulk', methods=['DELETE'])
+def delete_products():
+    """Delete products: {"ids": [4, 5, 6]}"""
+    try:
+        data = request.get_json()
+        ids = data.get('ids') if data else None
+        if not ids or not isinstance(ids, list):
+            return jsonify({"status": "error", "message": "'ids' must be a non-empty list"}), 400
+        
+        deleted = delete_many(ids)
+        return jsonify({
+            "status": "success",
+            "message": f"{deleted} products deleted successfully"
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/products/bulk/replicate', methods=['POST'])
+def replicate_products():
+    """Copy products: {"ids": [3], "times": 3}"""
+    try:
+        data = request.get_json()
+        ids = data.get('ids') if data else None
+        if not ids or not isinstance(ids, list):
+            return jsonify({"status": "error", "message": "'ids' must be a non-empty list"}), 400
+        
+        new_ids = replicate_many(ids, data.get('times', 1))
+        return jsonify({
+            "status": "success",
+            "message": f"{len(new_ids)} copies created",
+            "ids": new_ids
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
 
 
 def format_product(product_row):
@@ -233,6 +585,57 @@ def format_product(product_row):
             "price": product_row[5]
         }
 
+def stream_chunks(batches, fmt="json", original_command=None):
+    """
+    (chunk iterator, mimetype) writing row batches as they are read
+    - ndjson: one product per line
+    - json: the format_response shape, encoded incrementally
+      (the count comes last since it is only known at the end)
+    """
+    if fmt == "ndjson":
+        def generate():
+            for rows in batches:
+                yield "".join(json.dumps(format_product(row)) + "\n" for row in rows)
+        return generate(), "application/x-ndjson"
+    
+    def generate():
+        yield '{"status": "success", "original_command": ' + json.dumps(original_command) + ', "data": ['
+        count = 0
+        for rows in batches:
+            chunk = ",".join(json.dumps(format_product(row)) for row in rows)
+            yield ("," if count else "") + chunk
+            count += len(rows)
+        yield '], "response": ' + json.dumps(f"Found {count} products") + '}'
+    return generate(), "application/json"
+
+def stream_response(batches, fmt="json", original_command=None):
+    """Response writing row batches to the socket as they are read"""
+    chunks, mimetype = stream_chunks(batches, fmt, original_command)
+    return Response(chunks, mimetype=mimetype)
+
+def chat_result(data, db_command):
+    """
+    /api/chat body handling shared by the Flask and ASGI apps (blocking: runs the query)
+    - cursor / limit: next page of a listing
+    - stream / format: every matching row, written batch by batch
+    Returns (chunk iterator, mimetype) for a stream, else (format_response dict, None)
+    """
+    user_message = data["message"]
+    if hasattr(db_command, "action"):
+        # Next page of a listing: the client sends back next_cursor (and limit)
+        if data.get("cursor"):
+            db_command.cursor = data["cursor"]
+        if data.get("limit"):
+            db_command.limit = int(data["limit"])
+        
+        if data.get("stream"):
+            batches = stream_command(db_command)
+            if batches is not None:
+                return stream_chunks(batches, data.get("format", "json"), user_message)
+    
+    result = execute_command(db_command)
+    return format_response(result, user_message), None
+
 def format_response(result, original_command):
     """Format database result for frontend consumption"""
     try:
@@ -246,12 +649,17 @@ def format_response(result, original_command):
                         if formatted:
                             data.append(formatted)
                     
-                    return {
+                    response = {
                         "status": "success",
                         "response": f"Found {len(data)} products",
                         "data": data,
                         "original_command": original_command
                     }
+                    if result.get('next_cursor'):
+                        # More rows match: the client passes this back to get the next page
+                        response["response"] = f"Showing {len(data)} products (more available)"
+                        response["next_cursor"] = result['next_cursor']
+                    return response
                 else:
                     # Single product result
                     formatted = format_product(result['result'])
@@ -314,6 +722,9 @@ def format_response_text(result, original_command):
                             return f"I found one product: {product['name']} in {product['category']}, priced at ${product['price']}"
                         else:
                             return "I found one product but couldn't retrieve its details"
+                    elif result.get('next_cursor'):
+                        # One page of a longer listing: the count is not the total
+                        return f"Here are {count} of the products matching your request for {original_command}, and there are more"
                     else:
                         return f"I found {count} products matching your request for {original_command}"
                 else:
@@ -335,11 +746,21 @@ if __name__ == '__main__':
     print("🚀 Starting Flask Backend Server...")
     print("\n📡 Available endpoints:")
     print("   - POST /api/chat (text commands)")
-    print("   - GET /api/products (all products)")
+    print("   - POST /api/voice (audio or stream session → command result in one request)")
+    print("   - GET /api/products (products, paginated with limit/cursor)")
+    print("   - GET /api/products/export (stream all products as NDJSON/JSON)")
+    print("   - GET /api/products/search?q= (ranked full-text search)")
     print("   - GET /api/products/<id> (specific product)")
     print("   - POST /api/products (create product)")
     print("   - PUT /api/products/<id> (update product)")
     print("   - DELETE /api/products/<id> (delete product)")
+    print("   - POST/PUT/DELETE /api/products/bulk (bulk create/update/delete, one transaction)")
+    print("   - POST /api/products/bulk/replicate (copy products)")
+    print("   - GET/POST /api/speak (spoken response, cached)")
+    print("   - POST /api/transcribe (audio upload)")
+    print("   - POST /api/transcribe/stream[/<id>[/end]] (streaming transcription)")
+    print("   - POST /api/explain (query plan of a text command)")
+    print("   - GET /api/metrics (runtime metrics)")
     print("   - GET /api/health (health check)")
     
     # Run in debug mode for development
@@ -0,0 +1,116 @@
+"""
+ASGI entry point: async /api/chat and /api/transcribe, everything else
+served by the Flask app.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+- /api/chat awaits the LLM call and runs execute_command on a thread pool,
+  so a slow intent extraction no longer holds a worker thread.
+- /api/transcribe decodes and transcribes on a process pool
+  (ASR_PROCESSES processes, each with its own Whisper model).
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Whisper runs in the process pool here, not in this process
+os.environ.setdefault("WHISPER_PRELOAD", "0")
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import app as flask_app, chat_result, TRANSCRIBE_TIMEOUT
+from utils.tools import aget_intent
+from utils.utils import transcribe_with_stats, warm_up_models, NoSpeechDetected
+
+ASR_PROCESSES = int(os.getenv("ASR_PROCESSES", "1"))
+TRANSCRIBE_MAX_QUEUE = int(os.getenv("TRANSCRIBE_MAX_QUEUE", "8"))
+DB_THREADS = int(os.getenv("DB_THREADS", "8"))
+
+# spawn: torch is not fork-safe once threads exist in the parent
+asr_pool = ProcessPoolExecutor(
+    max_workers=ASR_PROCESSES,
+    mp_context=multiprocessing.get_context("spawn"),
+    initializer=warm_up_models,
+)
+db_pool = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+
+# Transcriptions queued or running in the process pool
+_transcriptions_in_flight = 0
+
+
+async def chat(request):
+    """Process text-based commands"""
+    try:
+        data = await request.json()
+        if not data or "message" not in data:
+            return JSONResponse({"success": False, "error": "No message provided"})
+
+        db_command = await aget_intent(data["message"])
+
+        # Same body handling as the Flask route (cursor, limit, stream)
+        loop = asyncio.get_running_loop()
+        body, mimetype = await loop.run_in_executor(db_pool, chat_result, data, db_command)
+        if mimetype:
+            # Starlette iterates a sync iterator on its thread pool
+            return StreamingResponse(body, media_type=mimetype)
+        return JSONResponse(body)
+    except Exception as e:
+        print(f"❌ Error in chat: {str(e)}")
+        return JSONResponse({
+            "status": "error",
+            "message": f"Chat processing failed: {str(e)}"
+        })
+
+
+def busy_response(status_code):
+    return JSONResponse(
+        {"success": False, "error": "Transcription service is busy, please retry shortly.", "retry_after": 1},
+        status_code=status_code,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def transcribe(request):
+    """Transcribe an uploaded recording on the process pool"""
+    global _transcriptions_in_flight
+
+    form = await request.form()
+    recording = form.get("audio_recording")
+    if recording is None or isinstance(recording, str):
+        return JSONResponse({"success": False, "error": "No audio file provided"}, status_code=400)
+    if not recording.filename:
+        return JSONResponse({"success": False, "error": "No selected file."}, status_code=400)
+
+    audio = await recording.read()
+    if not audio:
+        return JSONResponse({"success": False, "error": "Empty audio file."}, status_code=400)
+
+    if _transcriptions_in_flight >= ASR_PROCESSES + TRANSCRIBE_MAX_QUEUE:
+        return busy_response(429)
+
+    _transcriptions_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(asr_pool, transcribe_with_stats, audio)
+        transcription, cost = await asyncio.wait_for(job, timeout=TRANSCRIBE_TIMEOUT)
+        return JSONResponse({"success": True, "transcription": transcription, "cost": cost})
+    except NoSpeechDetected as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=422)
+    except asyncio.TimeoutError:
+        return busy_response(503)
+    except Exception as e:
+        print(f"An error occurred during transcription: {e}")
+        return JSONResponse({"success": False, "error": "Could not process audio."}, status_code=500)
+    finally:
+        _transcriptions_in_flight -= 1
+
+
+app = Starlette(routes=[
+    Route("/api/chat", chat, methods=["POST"]),
+    Route("/api/transcribe", transcribe, methods=["POST"]),
+    Mount("/", app=WSGIMiddleware(flask_app)),
+])
@@ -0,0 +1,140 @@
+"""
+Transcription benchmark: real-time factor (processing time / audio duration)
+and word error rate of each backend configuration on a set of clips.
+
+    python benchmarks/bench_asr.py                                  # test/*.mp3, whisper base
+    python benchmarks/bench_asr.py --backend whisper faster-whisper --model base small
+    python benchmarks/bench_asr.py --backend faster-whisper --compute-type int8 float32 --threads 4
+    python benchmarks/bench_asr.py --refs test.csv --vad
+
+--refs is a text file with one reference transcript per line, in clip order
+(test/0.mp3 is line 1, as written by utils/utils.py). Without it only the
+real-time factor is reported.
+"""
+import argparse
+import glob
+import itertools
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.asr import load_backend
+from utils.intent_cache import normalize_command
+from utils.utils import SAMPLE_RATE, decode_audio, detect_speech, speech_windows
+
+
+def clip_order(path):
+    """test/2.mp3 before test/10.mp3"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return (0, int(name), "") if name.isdigit() else (1, 0, name)
+
+
+def word_errors(reference, hypothesis):
+    """(edit distance in words, reference length), on normalized text"""
+    ref = normalize_command(reference).split()
+    hyp = normalize_command(hypothesis).split()
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def run(config, clips, references, use_vad):
+    """Load one backend configuration and transcribe every clip with it"""
+    started = time.perf_counter()
+    backend = load_backend(
+        config["backend"], model_size=config["model"], device="cpu",
+        threads=config["threads"], beam_size=config["beam_size"],
+        compute_type=config["compute_type"],
+    )
+    load_seconds = time.perf_counter() - started
+
+    audio_seconds = processing_seconds = 0.0
+    errors = words = 0
+    rtfs = []
+    for index, (path, audio) in enumerate(clips):
+        started = time.perf_counter()
+        windows = speech_windows(audio, detect_speech(audio)) if use_vad else [audio]
+        text = " ".join(backend.transcribe(window, config["lang"]).strip() for window in windows)
+        elapsed = time.perf_counter() - started
+
+        duration = len(audio) / SAMPLE_RATE
+        audio_seconds += duration
+        processing_seconds += elapsed
+        rtfs.append(elapsed / duration if duration else 0.0)
+        if references is not None and index < len(references):
+            e, n = word_errors(references[index], text)
+            errors += e
+            words += n
+        if config["verbose"]:
+            print(f"    {os.path.basename(path)}: {elapsed:.2f}s  {text!r}")
+
+    return {
+        "load_s": round(load_seconds, 2),
+        "audio_s": round(audio_seconds, 2),
+        "rtf": round(processing_seconds / audio_seconds, 3) if audio_seconds else None,
+        "rtf_p50": round(statistics.median(rtfs), 3) if rtfs else None,
+        "wer": round(errors / words, 3) if words else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcription backends (RTF / WER)")
+    parser.add_argument("clips", nargs="*", help="audio files (default: test/*.mp3, test/*.wav)")
+    parser.add_argument("--refs", help="reference transcripts, one line per clip in order")
+    parser.add_argument("--backend", nargs="+", default=["whisper"], help="whisper, faster-whisper")
+    parser.add_argument("--model", nargs="+", default=["base"], help="model sizes (tiny, base, small, ...)")
+    parser.add_argument("--compute-type", nargs="+", default=[None],
+                        help="faster-whisper quantization (int8, int8_float32, float32)")
+    parser.add_argument("--threads", nargs="+", type=int, default=[0], help="CPU threads (0: engine default)")
+    parser.add_argument("--beam-size", nargs="+", type=int, default=[1], help="1 = greedy decoding")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--vad", action="store_true", help="trim silence first, as transcribe_audio does")
+    parser.add_argument("--verbose", action="store_true", help="print each transcript")
+    args = parser.parse_args()
+
+    paths = args.clips or glob.glob(os.path.join(ROOT, "test", "*.mp3")) + glob.glob(os.path.join(ROOT, "test", "*.wav"))
+    paths = sorted(paths, key=clip_order)
+    if not paths:
+        parser.error("no clips found")
+    clips = []
+    for path in paths:
+        with open(path, "rb") as f:
+            clips.append((path, decode_audio(f.read())))
+
+    references = None
+    if args.refs:
+        with open(args.refs, encoding="utf-8") as f:
+            references = [line.strip() for line in f if line.strip()]
+        if len(references) < len(clips):
+            print(f"⚠️ {len(references)} references for {len(clips)} clips: WER covers the first {len(references)}")
+
+    print(f"{len(clips)} clips, {sum(len(a) for _, a in clips) / SAMPLE_RATE:.1f}s of audio"
+          + (", VAD on" if args.vad else ""))
+    print(f"{'backend':<16} {'model':<8} {'compute':<14} {'threads':>7} {'beam':>4} "
+          f"{'load (s)':>9} {'RTF':>7} {'RTF p50':>8} {'WER':>6}")
+    for backend, model, compute_type, threads, beam_size in itertools.product(
+            args.backend, args.model, args.compute_type, args.threads, args.beam_size):
+        config = {
+            "backend": backend, "model": model, "compute_type": compute_type,
+            "threads": threads, "beam_size": beam_size, "lang": args.lang, "verbose": args.verbose,
+        }
+        label = f"{backend:<16} {model:<8} {compute_type or 'default':<14} {threads or 'auto':>7} {beam_size:>4}"
+        try:
+            result = run(config, clips, references, args.vad)
+        except Exception as e:
+            print(f"{label} error: {e}")
+            continue
+        wer = "-" if result["wer"] is None else f"{result['wer']:.3f}"
+        print(f"{label} {result['load_s']:>9} {result['rtf']:>7} {result['rtf_p50']:>8} {wer:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Import-time benchmark: wall time and resident memory added by importing a
+module in a fresh interpreter, i.e. what every worker pays at boot.
+
+    python benchmarks/import_time.py                  # db.db vs pandas
+    python benchmarks/import_time.py db.db utils.tools app --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child: RSS before/after the import, from /proc (Linux) or getrusage
+PROBE = r"""
+import json, resource, sys, time
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+before = rss_kb()
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_kb() - before}))
+"""
+
+
+def measure(module, runs):
+    """Median import time and RSS delta of `module` over `runs` fresh interpreters"""
+    env = dict(os.environ, WHISPER_PRELOAD="0")
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE, module],
+            cwd=ROOT, env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+            return {"module": module, "error": error}
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(s["seconds"] for s in samples) * 1000, 1),
+        "rss_mb": round(statistics.median(s["rss_kb"] for s in samples) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-worker import cost")
+    parser.add_argument("modules", nargs="*", default=["db.db", "pandas"],
+                        help="modules to import (default: db.db and pandas for comparison)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    args = parser.parse_args()
+
+    print(f"{'module':<20} {'import (ms)':>12} {'RSS (MB)':>10}")
+    for module in args.modules:
+        result = measure(module, args.runs)
+        if "error" in result:
+            print(f"{module:<20} {'error: ' + result['error']}")
+        else:
+            print(f"{module:<20} {result['import_ms']:>12} {result['rss_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
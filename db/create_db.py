@@ -1,7 +1,13 @@
+import os
+import sys
 import sqlite3
 from faker import Faker
 import random
 
+# Run as `python3 db/create_db.py`: import db.db from the project root, not this folder
+sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+from db.db import ensure_schema
+
 #Initializz Faker
 faker = Faker()
 
@@ -11,6 +17,9 @@ cursor = conn.cursor()
 
 #drop and recreate table to avoid duplicate entries
 cursor.execute("DROP TABLE IF EXISTS products")
+# materialized statistics and the search index are rebuilt by ensure_schema below
+for table in ["product_stats", "category_stats", "category_colors", "products_fts"]:
+	cursor.execute(f"DROP TABLE IF EXISTS {table}")
 cursor.execute("""
 CREATE TABLE products (
 	id INTEGER PRIMARY KEY,
@@ -42,6 +51,11 @@ for i in range(1, 21):
 cursor.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)", products)
 conn.commit()
 
+# Indexes, statistics and search index, exactly as the app expects them
+ensure_schema(conn)
+cursor.execute("ANALYZE products")
+conn.commit()
+
 cursor.execute("SELECT * FROM products LIMIT 5")
 for row in cursor.fetchall():
     print(row)
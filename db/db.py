@@ -1,54 +1,459 @@
+import os
+import re
+import json
+import base64
 import sqlite3
+import queue
 import threading
+import time
+import atexit
+import inspect
+from collections import OrderedDict
+from functools import wraps
 from contextlib import contextmanager
-import pandas as pd
 
-# Thread-local storage for database connections
-_local = threading.local()
+# *******************************
+# Connection pool configuration
+DB_PATH = os.getenv("DB_PATH", "db/inventory.db")
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))       # seconds to wait for a free connection
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))  # SQLite busy handler
+LOCK_RETRIES = int(os.getenv("DB_LOCK_RETRIES", "3"))           # retries after "database is locked"
 
-def get_connection():
-    """Get a thread-local database connection"""
-    if not hasattr(_local, 'conn'):
-        _local.conn = sqlite3.connect("db/inventory.db", check_same_thread=False)
-        _local.conn.row_factory = sqlite3.Row  # Enable column access by name
-    return _local.conn
+# Applied to every new connection. WAL lets readers run alongside a writer;
+# synchronous=NORMAL is durable in WAL mode except on power loss.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size={os.getenv('DB_CACHE_SIZE', '-16000')}",    # negative = KiB (16 MB)
+    f"PRAGMA mmap_size={os.getenv('DB_MMAP_SIZE', '268435456')}",   # 256 MB
+    "PRAGMA temp_store=MEMORY",
+)
+
+def open_connection(path):
+    """New SQLite connection with the shared settings"""
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row  # Enable column access by name
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections shared by all threads.
+    Connections are opened on demand up to `size` and reused across requests.
+    """
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()  # most recently used first (warm page cache)
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return open_connection(self.path)
+
+    def acquire(self, timeout=POOL_TIMEOUT):
+        """Take an idle connection, opening a new one while under `size`"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {timeout}s") from None
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._all:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all = []
+            self._idle = queue.LifoQueue()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """The process-wide connection pool, created (and migrated) on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(DB_PATH, POOL_SIZE)
+                conn = pool.acquire()
+                try:
+                    ensure_schema(conn)
+                finally:
+                    pool.release(conn)
+                _pool = pool
+    return _pool
+
+# *******************************
+# Schema migrations
+# Secondary indexes on the filterable/sortable fields. Each one also holds the
+# rowid, so "WHERE category = ? ORDER BY id" and "ORDER BY price, id" are
+# served straight from the index.
+INDEXES = {
+    "idx_products_name": "CREATE INDEX IF NOT EXISTS idx_products_name ON products (name)",
+    "idx_products_category": "CREATE INDEX IF NOT EXISTS idx_products_category ON products (category)",
+    "idx_products_color": "CREATE INDEX IF NOT EXISTS idx_products_color ON products (color)",
+    "idx_products_quantity": "CREATE INDEX IF NOT EXISTS idx_products_quantity ON products (quantity)",
+    "idx_products_price": "CREATE INDEX IF NOT EXISTS idx_products_price ON products (price)",
+}
+
+def ensure_schema(conn):
+    """Bring an existing database up to date (idempotent)"""
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for statement in INDEXES.values():
+                    conn.execute(statement)
+                
+                # Materialized statistics, backfilled whenever the tables or
+                # their triggers are new (e.g. after db/create_db.py)
+                existing = conn.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE name IN "
+                    "('product_stats', 'products_stats_insert', 'products_stats_delete', 'products_stats_update')"
+                ).fetchone()[0]
+                for statement in STATS_TABLES:
+                    conn.execute(statement)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(product_stats)")}
+                if "data_version" not in columns:
+                    # Older databases: add the version counter and recreate the
+                    # triggers so they bump it
+                    conn.execute("ALTER TABLE product_stats ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0")
+                    for name in STATS_TRIGGER_NAMES:
+                        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                for statement in STATS_TRIGGERS:
+                    conn.execute(statement)
+                if existing < 4:
+                    _rebuild_stats(conn)
+                _ensure_fts(conn)
+                # Refresh planner statistics only when they are missing or stale
+                conn.execute("PRAGMA optimize")
+            return
+        except sqlite3.OperationalError as e:
+            # Another worker may be migrating at the same time
+            if "locked" not in str(e) or attempt == LOCK_RETRIES:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+def explain_query_plan(query, params=()):
+    """
+    EXPLAIN QUERY PLAN for a query, e.g. explain_query_plan(*filter_query("price", ">", 100))
+    Returns the plan steps and whether any step avoids a full table scan.
+    """
+    with get_cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        steps = [row["detail"] for row in cursor.fetchall()]
+    # "VIRTUAL TABLE INDEX 0:" is a full scan of products_fts; any constraint after the colon uses it
+    uses_index = any("USING" in step and "INDEX" in step or "INTEGER PRIMARY KEY" in step
+                     or re.search(r"VIRTUAL TABLE INDEX \d+:\S", step) for step in steps)
+    return {"query": query, "plan": steps, "uses_index": uses_index}
 
 @contextmanager
-def get_cursor():
-    """Context manager for database operations"""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_connection():
+    """Borrow a pooled database connection"""
+    pool = get_pool()
+    conn = pool.acquire()
     try:
-        yield cursor
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
+        yield conn
     finally:
-        cursor.close()
+        pool.release(conn)
+
+@contextmanager
+def get_cursor(immediate=False):
+    """
+    Context manager for database operations (one transaction).
+    immediate=True takes the write lock up front (BEGIN IMMEDIATE) so a
+    read-then-write transaction waits on the busy handler instead of failing
+    with "database is locked" when it upgrades.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            if immediate:
+                cursor.execute("BEGIN IMMEDIATE")
+            yield cursor
+            conn.commit()
+            if immediate:
+                # Every write path runs here: cached reads are now stale
+                result_cache.invalidate()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            cursor.close()
+
+def retry_on_locked(func):
+    """Retry the whole operation with backoff when SQLite reports a lock"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(LOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                locked = "locked" in str(e) or "busy" in str(e)
+                if not locked or attempt == LOCK_RETRIES:
+                    raise
+                time.sleep(0.05 * 2 ** attempt)
+    return wrapper
+
+# *******************************
+# Read-through result cache
+# read/filters/sort results keyed on the normalized call, e.g.
+# ('filters', 'category', '=', 'Furniture', None, None). Entries are tagged
+# with the table generation they were read at; every committed write bumps the
+# generation, so a hit never returns rows older than this process's last write.
+# Entries also carry the database's data_version (product_stats, bumped by the
+# triggers on products), checked on every lookup, so writes made by other
+# worker processes invalidate them as well.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))  # entries, 0 disables
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "5"))    # seconds
+
+class ResultCache:
+    """
+    Size-bounded LRU of query results, invalidated by a generation counter.
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    _MISS = object()
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (generation, version, stored_at, result)
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark every cached result as stale (called after each write)"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def get(self, key, version=None):
+        """(generation, result); result is _MISS when not cached or stale (or read at another version)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] != self.generation or entry[1] != version
+                                      or time.monotonic() - entry[2] > self.ttl):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return self.generation, self._MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self.generation, entry[3]
+
+    def put(self, key, generation, result, version=None):
+        """Store a result read at `generation` and data `version`, unless a write happened since"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (generation, version, time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+def cached_result(func):
+    """Serve a read-only query function from result_cache"""
+    # (name, default) of each parameter, so f(x) and f(x, limit=None) share a key
+    params = [(p.name, p.default) for p in inspect.signature(func).parameters.values()]
+    names = {name for name, _ in params}
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if result_cache.max_size <= 0 or len(args) > len(params) or not names.issuperset(kwargs):
+            return func(*args, **kwargs)
+        values = list(args)
+        for name, default in params[len(args):]:
+            values.append(kwargs.get(name, default))
+        key = (func.__name__,) + tuple(_hashable(v) for v in values)
+        
+        version = data_version()
+        generation, result = result_cache.get(key, version)
+        if result is ResultCache._MISS:
+            result = func(*args, **kwargs)
+            result_cache.put(key, generation, result, version)
+        return result
+    return wrapper
+
+def data_version():
+    """Counter bumped by the triggers on every write to products, from any process"""
+    with get_connection() as conn:
+        row = conn.execute("SELECT data_version FROM product_stats WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+# *******************************
+# Keyset pagination
+# A cursor is an opaque token holding the sort key and id of the last row of
+# a page; the next page starts strictly after it, so deep pages cost the same
+# as the first one (no OFFSET).
+def encode_cursor(row, field='id'):
+    """Cursor token continuing after `row` in (field, id) order"""
+    payload = json.dumps({"f": field, "v": row[field], "id": row['id']})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token, field='id'):
+    """(sort value, id) stored in a cursor token"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = payload["v"], int(payload["id"])
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+    if payload.get("f") != field:
+        raise ValueError(f"Cursor was issued for a query sorted by '{payload.get('f')}', not '{field}'")
+    return value, last_id
+
+def next_cursor(rows, limit, field='id'):
+    """Cursor for the page after `rows`, or None when this was the last page"""
+    if limit and rows and len(rows) == limit:
+        return encode_cursor(rows[-1], field)
+    return None
+
+def _keyset(field, descending, after):
+    """WHERE condition (and params) selecting the rows after the `after` cursor"""
+    if after is None:
+        return None, ()
+    value, last_id = decode_cursor(after, field)
+    op = "<" if descending else ">"
+    if field == 'id':
+        return f"id {op} ?", (last_id,)
+    # SQLite sorts NULLs first in ascending order (last in descending), and a
+    # row comparison against NULL is never true, so NULL sort values get their own branch
+    if value is None:
+        if descending:
+            return f"({field} IS NULL AND id < ?)", (last_id,)
+        return f"(({field} IS NULL AND id > ?) OR {field} IS NOT NULL)", (last_id,)
+    if descending:
+        return f"(({field}, id) < (?, ?) OR {field} IS NULL)", (value, last_id)
+    return f"({field}, id) > (?, ?)", (value, last_id)
+
+def _limit(limit):
+    """LIMIT clause (and params) for an optional page size"""
+    if limit is None:
+        return "", ()
+    limit = int(limit)
+    if limit <= 0:
+        raise ValueError("limit must be a positive integer")
+    return " LIMIT ?", (limit,)
 
 # Create a new product
+@retry_on_locked
 def create(name, category, color, quantity, price):
     """Create a new product in the database"""
-    with get_cursor() as cursor:
+    with get_cursor(immediate=True) as cursor:
         cursor.execute("""
             INSERT INTO products (name, category, color, quantity, price)
             VALUES (?, ?, ?, ?, ?)
         """, (name, category, color, quantity, price))
         return cursor.lastrowid
 
+PRODUCT_FIELDS = ['name', 'category', 'color', 'quantity', 'price']
+
+def _next_id(cursor):
+    """
+    ID the next insert will get. products.id is an INTEGER PRIMARY KEY without
+    AUTOINCREMENT, so while the write lock is held rows inserted after this
+    call get consecutive IDs starting here.
+    """
+    cursor.execute("SELECT IFNULL(MAX(id), 0) + 1 FROM products")
+    return cursor.fetchone()[0]
+
+# Create many products in one transaction
+@retry_on_locked
+def create_many(products):
+    """
+    Insert products (dicts with PRODUCT_FIELDS, or tuples in that order) with
+    one executemany and one commit. Returns the new IDs in input order.
+    """
+    rows = []
+    for product in products:
+        if isinstance(product, dict):
+            missing = [f for f in PRODUCT_FIELDS if f not in product]
+            if missing:
+                raise ValueError(f"Missing required fields: {missing}")
+            rows.append(tuple(product[f] for f in PRODUCT_FIELDS))
+        else:
+            rows.append(tuple(product))
+    if not rows:
+        return []
+    
+    with get_cursor(immediate=True) as cursor:
+        first_id = _next_id(cursor)
+        cursor.executemany("""
+            INSERT INTO products (name, category, color, quantity, price)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        return list(range(first_id, first_id + len(rows)))
+
 # Fetch products by ID(s) or all products
-def read(product_ids=None):
+def read_query(limit=None, after=None):
+    """SQL and parameters for reading all products (one page when limit is set)"""
+    where, params = _keyset('id', False, after)
+    limit_sql, limit_params = _limit(limit)
+    query = "SELECT * FROM products"
+    if where:
+        query += f" WHERE {where}"
+    return query + " ORDER BY id" + limit_sql, params + limit_params
+
+@cached_result
+@retry_on_locked
+def read(product_ids=None, limit=None, after=None):
     """
     Read products from database
-    - product_ids=None: Read all products
+    - product_ids=None: Read all products (a page of `limit` rows after the `after` cursor)
     - product_ids=int: Read single product by ID
     - product_ids=list: Read multiple products by IDs
     """
     with get_cursor() as cursor:
         if product_ids is None:
             # Read all products
-            cursor.execute("SELECT * FROM products ORDER BY id")
+            cursor.execute(*read_query(limit, after))
             return cursor.fetchall()
         
         elif isinstance(product_ids, int):
@@ -71,28 +476,65 @@ def read(product_ids=None):
 # Update any field of a product
 def update(product_id, field, value):
     """Update a specific field of a product"""
-    # Validate field name to prevent SQL injection
-    allowed_fields = ['name', 'category', 'color', 'quantity', 'price']
-    if field not in allowed_fields:
-        raise ValueError(f"Invalid field '{field}'. Allowed fields: {allowed_fields}")
+    update_fields(product_id, {field: value})
+
+def _set_clause(fields):
+    """Validated "a = ?, b = ?" for the given field names"""
+    # Validate field names to prevent SQL injection
+    for field in fields:
+        if field not in PRODUCT_FIELDS:
+            raise ValueError(f"Invalid field '{field}'. Allowed fields: {PRODUCT_FIELDS}")
+    if not fields:
+        raise ValueError("No fields to update")
+    return ", ".join(f"{field} = ?" for field in fields)
+
+# Update several fields of a product in one statement
+@retry_on_locked
+def update_fields(product_id, values):
+    """Update several fields of a product with a single UPDATE ... SET a = ?, b = ?"""
+    fields = list(values)
+    query = f"UPDATE products SET {_set_clause(fields)} WHERE id = ?"
     
-    with get_cursor() as cursor:
-        # Check if product exists first
-        cursor.execute("SELECT id FROM products WHERE id = ?", (product_id,))
-        if not cursor.fetchone():
-            raise ValueError(f"Product with ID {product_id} not found")
-        
-        # Update the field
-        query = f"UPDATE products SET {field} = ? WHERE id = ?"
-        cursor.execute(query, (value, product_id))
-        
+    with get_cursor(immediate=True) as cursor:
+        cursor.execute(query, [values[f] for f in fields] + [product_id])
         if cursor.rowcount == 0:
-            raise ValueError(f"No product updated with ID {product_id}")
+            raise ValueError(f"Product with ID {product_id} not found")
+
+# Update many products in one transaction
+@retry_on_locked
+def update_many(updates):
+    """
+    Apply [(product_id, {field: value, ...}), ...] in one transaction.
+    Updates touching the same fields share one executemany. Nothing is
+    committed if any product is missing.
+    """
+    groups = {}
+    for product_id, values in updates:
+        fields = tuple(values)
+        groups.setdefault(fields, []).append([values[f] for f in fields] + [product_id])
+    
+    with get_cursor(immediate=True) as cursor:
+        for fields, rows in groups.items():
+            query = f"UPDATE products SET {_set_clause(fields)} WHERE id = ?"
+            cursor.executemany(query, rows)
+            if cursor.rowcount != len(rows):
+                ids = [row[-1] for row in rows]
+                _raise_missing(cursor, ids)
+        return len(updates)
+
+def _raise_missing(cursor, product_ids):
+    """Raise ValueError naming the IDs that are not in products"""
+    placeholders = ','.join('?' for _ in product_ids)
+    cursor.execute(f"SELECT id FROM products WHERE id IN ({placeholders})", list(product_ids))
+    found = {row['id'] for row in cursor.fetchall()}
+    missing = sorted(set(product_ids) - found)
+    raise ValueError(f"Products with IDs {missing} not found")
 
 # Remove a product by ID
+@retry_on_locked
 def delete(product_id):
     """Delete a product by ID"""
-    with get_cursor() as cursor:
+    with get_cursor(immediate=True) as cursor:
         # Check if product exists first
         cursor.execute("SELECT id FROM products WHERE id = ?", (product_id,))
         if not cursor.fetchone():
@@ -104,9 +546,29 @@ def delete(product_id):
         if cursor.rowcount == 0:
             raise ValueError(f"No product deleted with ID {product_id}")
 
+# Remove many products in one transaction
+@retry_on_locked
+def delete_many(product_ids):
+    """Delete products by ID with one executemany; nothing is deleted if any ID is missing"""
+    product_ids = list(dict.fromkeys(product_ids))  # drop duplicates, keep order
+    if not product_ids:
+        return 0
+    
+    with get_cursor(immediate=True) as cursor:
+        _check_exist(cursor, product_ids)
+        cursor.executemany("DELETE FROM products WHERE id = ?", [(i,) for i in product_ids])
+        return cursor.rowcount
+
+def _check_exist(cursor, product_ids):
+    """Raise ValueError unless every ID is in products"""
+    placeholders = ','.join('?' for _ in product_ids)
+    cursor.execute(f"SELECT COUNT(*) FROM products WHERE id IN ({placeholders})", list(product_ids))
+    if cursor.fetchone()[0] != len(set(product_ids)):
+        _raise_missing(cursor, product_ids)
+
 # Find products by specific criteria
-def filters(field, operator, value):
-    """Filter products by field, operator, and value"""
+def _condition(field, operator, value):
+    """Validated "field operator ?" condition and its parameter"""
     # Validate field name to prevent SQL injection
     allowed_fields = ['id', 'name', 'category', 'color', 'quantity', 'price']
     if field not in allowed_fields:
@@ -117,35 +579,153 @@ def filters(field, operator, value):
     if operator not in allowed_operators:
         raise ValueError(f"Invalid operator '{operator}'. Allowed operators: {allowed_operators}")
     
+    # Handle LIKE operator for case-insensitive string matching
+    if operator == 'LIKE':
+        value = f"%{value}%"
+        if field in FTS_FIELDS and fts_available() and _fts_selective(field, value):
+            # Served by the trigram index instead of scanning products
+            return f"id IN (SELECT rowid FROM products_fts WHERE {field} LIKE ?)", (value,)
+    
+    return f"{field} {operator} ?", (value,)
+
+def filter_query(field, operator, value, limit=None, after=None):
+    """Validated SQL and parameters for filters()"""
+    condition, params = _condition(field, operator, value)
+    query = f"SELECT * FROM products WHERE {condition}"
+    
+    # Pages are in id order
+    where, keyset_params = _keyset('id', False, after)
+    if where:
+        query += f" AND {where}"
+    limit_sql, limit_params = _limit(limit)
+    return query + " ORDER BY id" + limit_sql, params + keyset_params + limit_params
+
+@cached_result
+@retry_on_locked
+def filters(field, operator, value, limit=None, after=None):
+    """Filter products by field, operator, and value (one page when limit is set)"""
+    query, params = filter_query(field, operator, value, limit, after)
     with get_cursor() as cursor:
-        query = f"SELECT * FROM products WHERE {field} {operator} ? ORDER BY id"
-        
-        # Handle LIKE operator for case-insensitive string matching
-        if operator == 'LIKE':
-            value = f"%{value}%"
-        
-        cursor.execute(query, (value,))
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+# Compound filters: AND/OR groups of conditions, one query
+# `where` is a nested dict (FilterGroup.model_dump()):
+#   {"logic": "and", "conditions": [
+#       {"field": "color", "operator": "=", "value": "red"},
+#       {"logic": "or", "conditions": [...]}]}
+MAX_CONDITIONS = 32
+MAX_DEPTH = 4
+
+def _where_sql(group, counter, depth=0):
+    """Validated SQL (and params) of a condition group"""
+    if depth > MAX_DEPTH:
+        raise ValueError(f"Filter groups nest at most {MAX_DEPTH} levels deep")
+    logic = str(group.get("logic") or "and").upper()
+    if logic not in ('AND', 'OR'):
+        raise ValueError(f"Invalid logic '{logic}'. Allowed: and, or")
+    conditions = group.get("conditions") or []
+    if not conditions:
+        raise ValueError("A filter group needs at least one condition")
+    
+    parts, params = [], ()
+    for condition in conditions:
+        if "conditions" in condition:
+            sql, sub_params = _where_sql(condition, counter, depth + 1)
+            parts.append(f"({sql})")
+        else:
+            counter[0] += 1
+            if counter[0] > MAX_CONDITIONS:
+                raise ValueError(f"At most {MAX_CONDITIONS} conditions per filter")
+            sql, sub_params = _condition(condition.get("field"), condition.get("operator"), condition.get("value"))
+            parts.append(sql)
+        params += sub_params
+    return f" {logic} ".join(parts), params
+
+def compound_query(where, order_by=None, descending=False, limit=None, after=None):
+    """Validated SQL and parameters for compound_filters()"""
+    order_by = order_by or 'id'
+    condition, params = _where_sql(where, [0])
+    query = f"SELECT * FROM products WHERE ({condition})"
+    
+    # Pages follow the sort order, as in sort_query
+    order_sql = _order_by(order_by, descending)
+    keyset, keyset_params = _keyset(order_by, descending, after)
+    if keyset:
+        query += f" AND {keyset}"
+    limit_sql, limit_params = _limit(limit)
+    return query + order_sql + limit_sql, params + keyset_params + limit_params
+
+@cached_result
+@retry_on_locked
+def compound_filters(where, order_by=None, descending=False, limit=None, after=None):
+    """Products matching an AND/OR condition tree, optionally sorted (one page when limit is set)"""
+    query, params = compound_query(where, order_by, descending, limit, after)
+    with get_cursor() as cursor:
+        cursor.execute(query, params)
         return cursor.fetchall()
 
 # Sort by any field
-def sort(field, descending=False):
-    """Sort products by a specific field"""
+def _order_by(field, descending=False):
+    """Validated ORDER BY clause"""
     # Validate field name to prevent SQL injection
     allowed_fields = ['id', 'name', 'category', 'color', 'quantity', 'price']
     if field not in allowed_fields:
         raise ValueError(f"Invalid field '{field}'. Allowed fields: {allowed_fields}")
     
     order = "DESC" if descending else "ASC"
-    
+    if field == 'id':
+        return f" ORDER BY id {order}"
+    # id breaks ties so the order is stable (and matches the index order)
+    return f" ORDER BY {field} {order}, id {order}"
+
+def sort_query(field, descending=False, limit=None, after=None):
+    """Validated SQL and parameters for sort()"""
+    order_sql = _order_by(field, descending)
+    query = "SELECT * FROM products"
+    where, params = _keyset(field, descending, after)
+    if where:
+        query += f" WHERE {where}"
+    limit_sql, limit_params = _limit(limit)
+    return query + order_sql + limit_sql, params + limit_params
+
+@cached_result
+@retry_on_locked
+def sort(field, descending=False, limit=None, after=None):
+    """Sort products by a specific field (one page when limit is set)"""
+    query, params = sort_query(field, descending, limit, after)
     with get_cursor() as cursor:
-        query = f"SELECT * FROM products ORDER BY {field} {order}"
-        cursor.execute(query)
+        cursor.execute(query, params)
         return cursor.fetchall()
 
+# Stream the rows of a query
+STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "500"))
+
+def iter_batches(query, params=(), batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield the rows of a query in lists of at most batch_size (cursor.fetchmany),
+    so memory stays constant however many rows match. A stream lasts as long
+    as its client takes to download it, so it reads on its own connection
+    (closed with the iterator) instead of holding one of the pool's.
+    """
+    get_pool()  # schema migrated before the first read
+    conn = open_connection(DB_PATH)
+    try:
+        conn.execute("PRAGMA query_only=ON")
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
 # Copy an existing product
+@retry_on_locked
 def replicate(product_id):
     """Create a copy of an existing product"""
-    with get_cursor() as cursor:
+    with get_cursor(immediate=True) as cursor:
         # Get the original product
         cursor.execute("SELECT * FROM products WHERE id = ?", (product_id,))
         product = cursor.fetchone()
@@ -162,43 +742,381 @@ def replicate(product_id):
         
         return cursor.lastrowid
 
-# Get database statistics
-#def get_connection():
-#    return sqlite3.connect(DB_PATH)
+# Copy existing products, possibly several times each
+@retry_on_locked
+def replicate_many(product_ids, times=1):
+    """
+    Copy each product `times` times in one transaction (INSERT ... SELECT run
+    through executemany). Returns the new IDs.
+    """
+    if isinstance(product_ids, int):
+        product_ids = [product_ids]
+    times = int(times)
+    if times <= 0:
+        raise ValueError("times must be a positive integer")
+    if not product_ids:
+        return []
+    
+    with get_cursor(immediate=True) as cursor:
+        _check_exist(cursor, product_ids)
+        first_id = _next_id(cursor)
+        copies = [(product_id,) for product_id in product_ids for _ in range(times)]
+        cursor.executemany("""
+            INSERT INTO products (name, category, color, quantity, price)
+            SELECT name, category, color, quantity, price FROM products WHERE id = ?
+        """, copies)
+        return list(range(first_id, first_id + len(copies)))
 
-def get_overall_stats():
-    with get_connection() as conn:
-        df = pd.read_sql("SELECT * FROM products", conn)
-        total_products = len(df)
-        avg_price = df["price"].mean()
-        total_value = (df["price"] * df["quantity"]).sum()
-        avg_quantity = df["quantity"].mean()
-        return {
-            "total_products": total_products,
-            "average_price": round(avg_price, 2),
-            "total_inventory_value": round(total_value, 2),
-            "average_quantity": round(avg_quantity, 2)
-        }
-
-def get_category_stats():
+# Full-text search
+# products_fts is an FTS5 trigram index over name/category/color. It is an
+# external-content table (the text stays in products) kept in sync by
+# triggers, so every write path updates it. Trigram indexes serve both MATCH
+# and LIKE '%...%' lookups, which would otherwise scan the whole table.
+FTS_TABLE = """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, category, color,
+    content='products', content_rowid='id', tokenize='trigram'
+)"""
+FTS_FIELDS = ('name', 'category', 'color')
+FTS_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, category, color)
+        VALUES (NEW.id, NEW.name, NEW.category, NEW.color);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category, color)
+        VALUES ('delete', OLD.id, OLD.name, OLD.category, OLD.color);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, category, color ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category, color)
+        VALUES ('delete', OLD.id, OLD.name, OLD.category, OLD.color);
+        INSERT INTO products_fts (rowid, name, category, color)
+        VALUES (NEW.id, NEW.name, NEW.category, NEW.color);
+    END""",
+)
+# Relevance weights of name, category and color in bm25()
+FTS_WEIGHTS = (10.0, 2.0, 1.0)
+
+# Whether products_fts is usable (SQLite built with FTS5 >= 3.34 for trigram)
+_fts_ready = False
+
+def _ensure_fts(conn):
+    """Create products_fts and its triggers, indexing existing rows when new"""
+    global _fts_ready
+    existing = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name IN "
+        "('products_fts', 'products_fts_insert', 'products_fts_delete', 'products_fts_update')"
+    ).fetchone()[0]
+    try:
+        conn.execute(FTS_TABLE)
+    except sqlite3.OperationalError as e:
+        if "locked" in str(e):
+            raise
+        print(f"❌ Full-text search unavailable, using LIKE scans: {e}")
+        _fts_ready = False
+        return
+    for statement in FTS_TRIGGERS:
+        conn.execute(statement)
+    if existing < 4:
+        conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    _fts_ready = True
+
+def fts_available():
+    """Whether searches and text LIKE filters can use products_fts"""
+    get_pool()
+    return _fts_ready
+
+# The trigram subquery collects every match before ORDER BY / LIMIT apply:
+# a win for rare terms, but a common one is found sooner by scanning products
+# in page order, where LIMIT stops the scan early. A capped probe of the
+# index tells the two apart.
+FTS_SELECTIVE_ROWS = int(os.getenv("FTS_SELECTIVE_ROWS", "1000"))
+
+def _fts_selective(field, pattern):
+    """Whether fewer than FTS_SELECTIVE_ROWS rows match `pattern` (a %term% LIKE)"""
+    if len(pattern.strip("%")) < 3:
+        return False  # shorter than a trigram: the index cannot serve it
     with get_connection() as conn:
-        df = pd.read_sql("SELECT * FROM products", conn)
-        grouped = df.groupby("category").agg(
-            product_count=("id", "count"),
-            total_value=("price", lambda x: (x * df.loc[x.index, "quantity"]).sum()),
-            avg_price=("price", "mean"),
-            most_common_color=("color", lambda x: x.mode().iloc[0] if not x.mode().empty else None)
-        )
-        grouped = grouped.round(2).reset_index()
-        return grouped.to_dict(orient="records")
+        matches = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM products_fts WHERE {field} LIKE ? LIMIT ?)",
+            (pattern, FTS_SELECTIVE_ROWS)
+        ).fetchone()[0]
+    return matches < FTS_SELECTIVE_ROWS
+
+def _fts_phrase(term):
+    """FTS5 string literal (quotes escaped), so input is never parsed as query syntax"""
+    return '"' + term.replace('"', '""') + '"'
+
+def search_query(text, limit=None, match_all=True):
+    """
+    SQL and parameters for search(): products whose name/category/color
+    contain every term (any term with match_all=False), best matches first.
+    """
+    terms = str(text or "").split()
+    if not terms:
+        raise ValueError("Search text is empty")
+    limit_sql, limit_params = _limit(limit)
+    
+    # Trigrams need at least 3 characters per term
+    if fts_available() and all(len(term) >= 3 for term in terms):
+        joiner = " AND " if match_all else " OR "
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        query = f"""
+            SELECT products.* FROM products_fts
+            JOIN products ON products.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+            ORDER BY bm25(products_fts, {weights}), products.id
+        """
+        return query.strip() + limit_sql, (joiner.join(_fts_phrase(t) for t in terms),) + limit_params
+    
+    # Short terms (or no FTS5): LIKE over the three columns, in id order
+    matches = ["(name LIKE ? OR category LIKE ? OR color LIKE ?)"] * len(terms)
+    params = tuple(f"%{term}%" for term in terms for _ in FTS_FIELDS)
+    joiner = " AND " if match_all else " OR "
+    query = f"SELECT * FROM products WHERE {joiner.join(matches)} ORDER BY id"
+    return query + limit_sql, params + limit_params
+
+# Ranked search over name, category and color
+@cached_result
+@retry_on_locked
+def search(text, limit=None):
+    """
+    Products matching a free-text query, ranked by relevance (bm25).
+    When no product matches every term, products matching any of them are
+    returned instead (spoken queries often carry extra words).
+    """
+    with get_cursor() as cursor:
+        cursor.execute(*search_query(text, limit))
+        rows = cursor.fetchall()
+        if not rows and len(str(text).split()) > 1:
+            cursor.execute(*search_query(text, limit, match_all=False))
+            rows = cursor.fetchall()
+        return rows
+
+# Distinct values of a text field, most frequent first (e.g. for speech
+# recognition vocabulary). Categories and colors come from the trigger-maintained
+# stats tables, O(categories x colors); names are grouped from the index on name
+_MATERIALIZED_VALUES = {
+    "category": """SELECT category AS value FROM category_stats
+                   WHERE category != '' ORDER BY product_count DESC, category""",
+    "color": """SELECT color AS value FROM category_colors WHERE color != ''
+                GROUP BY color ORDER BY SUM(product_count) DESC, color""",
+}
+
+@cached_result
+@retry_on_locked
+def distinct_values(field, limit=None):
+    """Distinct non-null values of name, category or color, most common first"""
+    if field not in FTS_FIELDS:
+        raise ValueError(f"Invalid field '{field}'. Allowed fields: {list(FTS_FIELDS)}")
+    limit_sql, limit_params = _limit(limit)
+    if field in _MATERIALIZED_VALUES and STATS_SOURCE == "materialized":
+        with get_cursor() as cursor:
+            cursor.execute(_MATERIALIZED_VALUES[field] + limit_sql, limit_params)
+            return [row['value'] for row in cursor.fetchall()]
+    with get_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {field} AS value, COUNT(*) AS count FROM products
+            WHERE {field} IS NOT NULL AND {field} != ''
+            GROUP BY {field} ORDER BY count DESC, {field}
+        """ + limit_sql, limit_params)
+        return [row['value'] for row in cursor.fetchall()]
+
+# Get database statistics
+# Aggregates are materialized in three tables kept up to date by triggers on
+# products, so a stats request reads O(categories) rows instead of the table:
+# - product_stats: one row with the count and sums over all products
+# - category_stats: count and sums per category
+# - category_colors: color histogram per category
+STATS_TABLES = (
+    """CREATE TABLE IF NOT EXISTS product_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        product_count INTEGER NOT NULL DEFAULT 0,
+        sum_price REAL NOT NULL DEFAULT 0,
+        sum_quantity REAL NOT NULL DEFAULT 0,
+        sum_value REAL NOT NULL DEFAULT 0,
+        data_version INTEGER NOT NULL DEFAULT 0  -- bumped on every write, see ResultCache
+    )""",
+    """CREATE TABLE IF NOT EXISTS category_stats (
+        category TEXT PRIMARY KEY,
+        product_count INTEGER NOT NULL DEFAULT 0,
+        sum_price REAL NOT NULL DEFAULT 0,
+        sum_value REAL NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS category_colors (
+        category TEXT NOT NULL,
+        color TEXT NOT NULL,
+        product_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (category, color)
+    )""",
+)
+
+def _stats_delta(ref, sign):
+    """Trigger statements adding (sign='+') or removing (sign='-') row `ref` (NEW/OLD)"""
+    price = f"IFNULL({ref}.price, 0)"
+    quantity = f"IFNULL({ref}.quantity, 0)"
+    value = f"{price} * {quantity}"
+    one = 1 if sign == '+' else -1
+    statements = [
+        f"""UPDATE product_stats SET
+                product_count = product_count {sign} 1,
+                sum_price = sum_price {sign} {price},
+                sum_quantity = sum_quantity {sign} {quantity},
+                sum_value = sum_value {sign} {value},
+                data_version = data_version + 1
+            WHERE id = 1;""",
+        f"""INSERT INTO category_stats (category, product_count, sum_price, sum_value)
+            SELECT {ref}.category, {one}, {one} * {price}, {one} * {value}
+            WHERE {ref}.category IS NOT NULL
+            ON CONFLICT (category) DO UPDATE SET
+                product_count = product_count {sign} 1,
+                sum_price = sum_price {sign} {price},
+                sum_value = sum_value {sign} {value};""",
+        f"""INSERT INTO category_colors (category, color, product_count)
+            SELECT {ref}.category, {ref}.color, {one}
+            WHERE {ref}.category IS NOT NULL AND {ref}.color IS NOT NULL
+            ON CONFLICT (category, color) DO UPDATE SET
+                product_count = product_count {sign} 1;""",
+    ]
+    if sign == '-':
+        statements += [
+            f"DELETE FROM category_stats WHERE category = {ref}.category AND product_count <= 0;",
+            f"DELETE FROM category_colors WHERE category = {ref}.category AND color = {ref}.color AND product_count <= 0;",
+        ]
+    return "\n".join(statements)
+
+STATS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS products_stats_insert AFTER INSERT ON products BEGIN
+        {_stats_delta("NEW", "+")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_stats_delete AFTER DELETE ON products BEGIN
+        {_stats_delta("OLD", "-")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_stats_update
+        AFTER UPDATE OF category, color, quantity, price ON products BEGIN
+        {_stats_delta("OLD", "-")}
+        {_stats_delta("NEW", "+")}
+    END""",
+    # Columns the stats ignore still change what reads return
+    """CREATE TRIGGER IF NOT EXISTS products_version_update
+        AFTER UPDATE OF id, name ON products BEGIN
+        UPDATE product_stats SET data_version = data_version + 1 WHERE id = 1;
+    END""",
+)
+STATS_TRIGGER_NAMES = ("products_stats_insert", "products_stats_delete", "products_stats_update",
+                       "products_version_update")
+
+def _rebuild_stats(conn):
+    """Recompute the materialized aggregates from products (inside a transaction)"""
+    # The version only moves forward, so no cached result can match it again
+    row = conn.execute("SELECT MAX(data_version) FROM product_stats").fetchone()
+    version = (row[0] or 0) + 1
+    conn.execute("DELETE FROM product_stats")
+    conn.execute("DELETE FROM category_stats")
+    conn.execute("DELETE FROM category_colors")
+    conn.execute("""
+        INSERT INTO product_stats (id, product_count, sum_price, sum_quantity, sum_value, data_version)
+        SELECT 1, COUNT(*), IFNULL(SUM(price), 0), IFNULL(SUM(quantity), 0),
+               IFNULL(SUM(IFNULL(price, 0) * IFNULL(quantity, 0)), 0), ?
+        FROM products
+    """, (version,))
+    conn.execute("""
+        INSERT INTO category_stats (category, product_count, sum_price, sum_value)
+        SELECT category, COUNT(*), IFNULL(SUM(price), 0),
+               IFNULL(SUM(IFNULL(price, 0) * IFNULL(quantity, 0)), 0)
+        FROM products WHERE category IS NOT NULL GROUP BY category
+    """)
+    conn.execute("""
+        INSERT INTO category_colors (category, color, product_count)
+        SELECT category, color, COUNT(*)
+        FROM products WHERE category IS NOT NULL AND color IS NOT NULL
+        GROUP BY category, color
+    """)
+
+@retry_on_locked
+def rebuild_stats():
+    """Recompute the materialized statistics (e.g. after an external bulk load)"""
+    with get_cursor(immediate=True) as cursor:
+        _rebuild_stats(cursor.connection)
+
+# "materialized" reads the trigger-maintained tables; "scan" aggregates the
+# products table directly in SQL (no materialized tables needed)
+STATS_SOURCE = os.getenv("STATS_SOURCE", "materialized")
+
+def _overall_stats(count, sum_price, sum_quantity, sum_value):
+    return {
+        "total_products": count,
+        "average_price": round(sum_price / count, 2) if count else 0.0,
+        "total_inventory_value": round(sum_value, 2) if count else 0.0,
+        "average_quantity": round(sum_quantity / count, 2) if count else 0.0
+    }
+
+def _category_stats(row):
+    return {
+        "category": row['category'],
+        "product_count": row['product_count'],
+        "total_value": round(row['sum_value'], 2),
+        "avg_price": round(row['sum_price'] / row['product_count'], 2),
+        "most_common_color": row['most_common_color']
+    }
+
+@retry_on_locked
+def get_overall_stats(source=None):
+    with get_cursor() as cursor:
+        if (source or STATS_SOURCE) == "scan":
+            cursor.execute("""
+                SELECT COUNT(*) AS product_count, IFNULL(SUM(price), 0) AS sum_price,
+                       IFNULL(SUM(quantity), 0) AS sum_quantity,
+                       IFNULL(SUM(IFNULL(price, 0) * IFNULL(quantity, 0)), 0) AS sum_value
+                FROM products
+            """)
+        else:
+            cursor.execute("SELECT * FROM product_stats WHERE id = 1")
+        row = cursor.fetchone()
+    if row is None:
+        return _overall_stats(0, 0, 0, 0)
+    return _overall_stats(row['product_count'], row['sum_price'], row['sum_quantity'], row['sum_value'])
+
+@retry_on_locked
+def get_category_stats(source=None):
+    with get_cursor() as cursor:
+        if (source or STATS_SOURCE) == "scan":
+            cursor.execute("""
+                WITH colors AS (
+                    SELECT category, color,
+                           ROW_NUMBER() OVER (PARTITION BY category ORDER BY COUNT(*) DESC, color ASC) AS rank
+                    FROM products
+                    WHERE category IS NOT NULL AND color IS NOT NULL
+                    GROUP BY category, color
+                )
+                SELECT p.category, COUNT(*) AS product_count, IFNULL(SUM(p.price), 0) AS sum_price,
+                       IFNULL(SUM(IFNULL(p.price, 0) * IFNULL(p.quantity, 0)), 0) AS sum_value,
+                       c.color AS most_common_color
+                FROM products p
+                LEFT JOIN colors c ON c.category = p.category AND c.rank = 1
+                WHERE p.category IS NOT NULL
+                GROUP BY p.category
+                ORDER BY p.category
+            """)
+        else:
+            cursor.execute("""
+                SELECT s.category, s.product_count, s.sum_price, s.sum_value,
+                       (SELECT c.color FROM category_colors c
+                        WHERE c.category = s.category
+                        ORDER BY c.product_count DESC, c.color ASC LIMIT 1) AS most_common_color
+                FROM category_stats s
+                ORDER BY s.category
+            """)
+        rows = cursor.fetchall()
+    return [_category_stats(row) for row in rows]
 
 
 # Close all connections (useful for cleanup)
 def close_connections():
-    """Close all thread-local connections"""
-    if hasattr(_local, 'conn'):
-        _local.conn.close()
-        delattr(_local, 'conn')
+    """Close every pooled connection (process shutdown)"""
+    if _pool is not None:
+        _pool.close_all()
+
+atexit.register(close_connections)
 
 # Test the database functions
 if __name__ == "__main__":
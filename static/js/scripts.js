@@ -2,6 +2,13 @@
 let isRecording = false;
 let mediaRecorder = null;
 let audioChunks = [];
+// Streaming transcription: chunks are uploaded while recording
+const STREAM_TIMESLICE_MS = 500;
+let streamSessionId = null;
+let streamBroken = false;  // a chunk upload failed: the server-side stream has a gap
+let streamUploads = Promise.resolve();
+// Play the answer to voice commands (audio from /api/speak, cached server-side)
+const SPEAK_RESPONSES = true;
 // On page load, read the saved theme or default to 'light'
 let currentTheme = localStorage.getItem('theme') || 'light';
 
@@ -147,34 +154,22 @@ function hideLoading() {
     }
 }
 
-function simulateResponse(userMessage) {
+// cursor / limit: next page of a listing (the next_cursor of the previous answer)
+function simulateResponse(userMessage, cursor = null, limit = null) {
+    const body = { message: userMessage };
+    if (cursor) {
+        body.cursor = cursor;
+        if (limit) body.limit = limit;
+    }
     fetch("/api/chat", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: userMessage })
+        body: JSON.stringify(body)
     })
     .then(response => response.json())
     .then(data => {
         hideLoading();
-
-        if (data.status === "success") {
-            // Check if this is a statistics response
-            if (data.is_statistics && data.overview && data.by_category) {
-                console.log("📊 Displaying statistics");
-                displayStats(data);
-            } else if (data.response) {
-                addMessage(data.response, 'bot');
-                
-                // If there's data (products), display them
-                if (data.data && data.data.length > 0) {
-                    displayProductData(data.data);
-                }
-            } else {
-                addMessage("Command executed successfully.", 'bot');
-            }
-        } else {
-            addMessage(data.message || "I don't know what to do. Please be more clear.", "bot");
-        }
+        displayChatResponse(data);
     })
     .catch(error => {
         hideLoading();
@@ -183,6 +178,50 @@ function simulateResponse(userMessage) {
     });
 }
 
+function displayChatResponse(data) {
+    if (data.status === "success") {
+        // Check if this is a statistics response
+        if (data.is_statistics && data.overview && data.by_category) {
+            console.log("📊 Displaying statistics");
+            displayStats(data);
+        } else if (data.response) {
+            addMessage(data.response, 'bot');
+            
+            // If there's data (products), display them
+            if (data.data && data.data.length > 0) {
+                displayProductData(data.data);
+            }
+            if (data.next_cursor) {
+                addLoadMoreButton(data.original_command, data.next_cursor, data.data ? data.data.length : null);
+            }
+        } else {
+            addMessage("Command executed successfully.", 'bot');
+        }
+    } else {
+        addMessage(data.response || data.message || "I don't know what to do. Please be more clear.", "bot");
+    }
+}
+
+// More rows match a listing: fetch the next page of the same command
+function addLoadMoreButton(command, cursor, limit) {
+    const messagesArea = document.getElementById('messagesArea');
+    const moreDiv = document.createElement('div');
+    moreDiv.className = 'message bot';
+    
+    const button = document.createElement('button');
+    button.className = 'btn primary';
+    button.textContent = 'Load more';
+    button.addEventListener('click', () => {
+        moreDiv.remove();
+        showLoading();
+        simulateResponse(command, cursor, limit);
+    });
+    
+    moreDiv.appendChild(button);
+    messagesArea.appendChild(moreDiv);
+    messagesArea.scrollTop = messagesArea.scrollHeight;
+}
+
 function displayStats(result) {
     const messagesArea = document.getElementById('messagesArea');
     
@@ -332,18 +371,45 @@ async function startRecording() {
         
         mediaRecorder = new MediaRecorder(stream);
         audioChunks = [];
+        streamSessionId = await openTranscriptionStream();
+        streamBroken = false;
+        streamUploads = Promise.resolve();
         
-        mediaRecorder.ondataavailable = event => {audioChunks.push(event.data);};
+        mediaRecorder.ondataavailable = event => {
+            audioChunks.push(event.data);
+            if (streamSessionId) {
+                // Keep chunks in order: each upload waits for the previous one
+                const chunk = event.data;
+                streamUploads = streamUploads.then(() => sendStreamChunk(chunk));
+            }
+        };
         
         mediaRecorder.onstop = async () => {
-            const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
-            await processAudioTranscription(audioBlob);
+            if (streamSessionId) {
+                await streamUploads;
+            }
+            if (streamSessionId && !streamBroken) {
+                await finishTranscriptionStream();
+            } else if (streamSessionId) {
+                // Missing chunks: the stream would not decode, upload the whole clip
+                streamSessionId = null;
+                const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
+                await processAudioTranscription(audioBlob);
+            } else {
+                const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
+                await processAudioTranscription(audioBlob);
+            }
             
             // Stop all tracks to release microphone
             stream.getTracks().forEach(track => track.stop());
         };
         
-        mediaRecorder.start();
+        // With a stream session, emit a chunk every STREAM_TIMESLICE_MS
+        if (streamSessionId) {
+            mediaRecorder.start(STREAM_TIMESLICE_MS);
+        } else {
+            mediaRecorder.start();
+        }
         isRecording = true;
         updateRecordingUI();
         
@@ -362,35 +428,107 @@ function stopRecording() {
 }
 
 async function processAudioTranscription(audioBlob) {
-    const messageInput = document.getElementById('messageInput');
-    messageInput.placeholder = 'Transcribing audio...';
-    
     const formData = new FormData();
     formData.append("audio_recording", audioBlob, "recording.webm");
+    await runVoiceCommand(formData);
+}
+
+// Transcription, intent and execution happen server-side in one request
+async function runVoiceCommand(formData) {
+    const messageInput = document.getElementById('messageInput');
+    messageInput.placeholder = 'Transcribing audio...';
+    showLoading();
     
     try {
-        const response = await fetch("/api/transcribe", {
+        const response = await fetch("/api/voice", {
             method: "POST",
             body: formData
         });
 
         const data = await response.json();
+        hideLoading();
+        messageInput.placeholder = 'Type your message here...';
         
         if (data.success) {
-            messageInput.placeholder = 'Type your message here...';
-            messageInput.value = data.transcription || '';
-
+            messageInput.value = '';
             autoResize(messageInput);
             updateSendButtonState();
-            messageInput.focus();
-        } else {
+            addMessage(data.transcription, 'user');
+            displayChatResponse(data);
+            if (SPEAK_RESPONSES && data.spoken_response) {
+                playSpokenResponse(data.spoken_response);
+            }
+        } else if (response.status !== 404) {
+            // 404: expired stream session, the caller falls back to an upload
             const errorMessage = data.error || "Action unclear. Please try again.";
             addMessage(errorMessage, "bot");
         }
+        return response.status;
     } catch (error) {
-        console.error('Transcription error:', error);
+        hideLoading();
+        console.error('Voice command error:', error);
         messageInput.placeholder = 'Type your message here...';
         addMessage("Sorry, transcription failed. Please check your connection or try again.", "bot");
+        return null;
+    }
+}
+
+function playSpokenResponse(text) {
+    // The browser streams the audio as it downloads
+    const audio = new Audio(`/api/speak?text=${encodeURIComponent(text)}`);
+    audio.play().catch(error => console.warn('Could not play spoken response:', error));
+}
+
+async function openTranscriptionStream() {
+    try {
+        const response = await fetch("/api/transcribe/stream", { method: "POST" });
+        const data = await response.json();
+        return data.success ? data.session_id : null;
+    } catch (error) {
+        console.warn('Streaming transcription unavailable, falling back to upload:', error);
+        return null;
+    }
+}
+
+async function sendStreamChunk(chunk) {
+    if (!streamSessionId || streamBroken) return;
+    try {
+        const response = await fetch(`/api/transcribe/stream/${streamSessionId}`, {
+            method: "POST",
+            headers: { "Content-Type": "application/octet-stream" },
+            body: chunk
+        });
+        const data = await response.json();
+        if (!response.ok || !data.success) {
+            // 404 expired, 413 over the stream limit, ...: stop streaming
+            console.warn('Stream chunk rejected, the full recording will be uploaded:', data.error);
+            streamBroken = true;
+            return;
+        }
+        if (data.partial) {
+            const messageInput = document.getElementById('messageInput');
+            messageInput.value = data.partial;
+            autoResize(messageInput);
+        }
+    } catch (error) {
+        console.error('Stream chunk error:', error);
+        streamBroken = true;
+    }
+}
+
+async function finishTranscriptionStream() {
+    const formData = new FormData();
+    formData.append("session_id", streamSessionId);
+    
+    try {
+        const status = await runVoiceCommand(formData);
+        if (status === 404) {
+            // Session expired on the server: upload the whole clip instead
+            const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
+            await processAudioTranscription(audioBlob);
+        }
+    } finally {
+        streamSessionId = null;
     }
 }
 
@@ -0,0 +1,71 @@
+import pytest
+
+from utils.fast_intent import parse_command
+from utils.models import Action, Operator
+
+
+def _parsed(command):
+    result = parse_command(command)
+    assert result is not None, f"{command!r} was deferred to the LLM"
+    return result
+
+
+@pytest.mark.parametrize("command, row", [
+    ("delete row 4", 4),
+    ("Delete product Two!", 2),
+    ("delete rows 4, 5 and 6", [4, 5, 6]),
+])
+def test_delete(command, row):
+    result = _parsed(command)
+    assert (result.action, result.row) == (Action.delete, row)
+
+
+def test_read_all():
+    assert _parsed("show all products").action == Action.read
+
+
+def test_create_keeps_name_spelling():
+    result = _parsed("Add a new product: Oak-Desk McQueen, furniture, Red, 5, $120.50")
+    assert result.action == Action.create
+    assert result.value.name == "Oak-Desk McQueen"
+    assert (result.value.category, result.value.color) == ("Furniture", "red")
+    assert (result.value.quantity, result.value.price) == (5, 120.5)
+
+
+def test_create_needs_word_boundaries():
+    # "address..." is not "add ..."
+    assert parse_command("address book, Books, blue, 3, 10") is None
+
+
+def test_update():
+    result = _parsed("update row 3 price to 20")
+    assert (result.action, result.row, result.field, result.value) == (Action.update, 3, "price", 20.0)
+
+
+@pytest.mark.parametrize("command, field, operator, value", [
+    ("price greater than 100", "price", Operator.gt, 100.0),
+    ("quantity at least 10", "quantity", Operator.gte, 10.0),
+    ("show all red products", "color", Operator.eq, "red"),
+])
+def test_filters(command, field, operator, value):
+    result = _parsed(command)
+    assert (result.action, result.field, result.operator, result.value) == (Action.filters, field, operator, value)
+
+
+def test_stats_word_as_value_is_not_stats():
+    result = _parsed("update row 2 name to Total Count")
+    assert (result.action, result.field, result.value) == (Action.update, "name", "Total Count")
+
+
+@pytest.mark.parametrize("command", [
+    "delete rows 4-6",
+    "delete rows 4 - 6",
+    "delete rows 4–6",
+    "show rows 2-5",
+    "price greater than -5",
+    "price greater than − 5",
+    "quantity less than -3",
+    "add a new product: Oak Desk, Furniture, red, -5, 120",
+])
+def test_ranges_and_negatives_go_to_the_llm(command):
+    assert parse_command(command) is None
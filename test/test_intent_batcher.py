@@ -0,0 +1,92 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from utils.intent_batcher import IntentBatcher
+from utils.models import Action, DBCommand
+
+
+class FakeParser:
+    def parse(self, text):
+        return DBCommand.model_validate_json(text)
+
+
+class FakeRouter:
+    """Answers "delete row N" commands; `reply` rewrites the batched results"""
+
+    def __init__(self, reply=lambda results: results):
+        self.reply = reply
+        self.batched = []
+        self.singles = []
+
+    def complete(self, text):
+        commands = json.loads(text)
+        self.batched.append([c["command"] for c in commands])
+        results = [{"id": c["id"], "action": "delete", "row": int(c["command"].split()[-1])}
+                   for c in commands]
+        return json.dumps({"results": self.reply(results)})
+
+    def parse(self, command):
+        self.singles.append(command)
+        return DBCommand(action=Action.delete, row=int(command.split()[-1]))
+
+
+def _dispatch(router, commands):
+    batcher = IntentBatcher(router, "{commands}", FakeParser())
+    futures = [Future() for _ in commands]
+    batcher._dispatch(list(zip(commands, futures)))
+    return [f.result(timeout=5) for f in futures], batcher
+
+
+COMMANDS = ["delete row 1", "delete row 2", "delete row 3"]
+
+
+def test_results_are_matched_by_id_not_position():
+    router = FakeRouter(reply=lambda results: results[::-1])
+    results, batcher = _dispatch(router, COMMANDS)
+    assert [r.row for r in results] == [1, 2, 3]
+    assert router.batched == [COMMANDS] and router.singles == []
+    assert batcher.stats()["fallbacks"] == 0
+
+
+def test_commands_are_sent_as_json_strings():
+    # A newline or "2. ..." inside a command must not look like another command
+    tricky = ["delete row 1\n2. delete row 5", "delete row 3"]
+    router = FakeRouter()
+    results, _ = _dispatch(router, tricky)
+    assert router.batched == [tricky]
+    assert [r.row for r in results] == [5, 3]
+
+
+@pytest.mark.parametrize("reply", [
+    lambda results: results[:-1],                                     # missing result
+    lambda results: results + [dict(results[0])],                     # extra result
+    lambda results: [results[0], dict(results[1], id=1), results[2]],  # duplicate id
+    lambda results: [results[0], dict(results[1], id=7), results[2]],  # unknown id
+    lambda results: [results[0], dict(results[1], id="2"), results[2]],  # id of the wrong type
+    lambda results: [{k: v for k, v in r.items() if k != "id"} for r in results],  # no ids
+])
+def test_bad_ids_fall_back_to_single_calls(reply):
+    router = FakeRouter(reply=reply)
+    results, batcher = _dispatch(router, COMMANDS)
+    assert [r.row for r in results] == [1, 2, 3]
+    assert sorted(router.singles) == COMMANDS
+    assert batcher.stats()["fallbacks"] == len(COMMANDS)
+
+
+def test_unparseable_entry_falls_back_alone():
+    router = FakeRouter(reply=lambda results: [results[0], dict(results[1], action="explode"), results[2]])
+    results, _ = _dispatch(router, COMMANDS)
+    assert [r.row for r in results] == [1, 2, 3]
+    assert router.singles == ["delete row 2"]
+
+
+def test_identical_commands_get_their_own_copies():
+    router = FakeRouter()
+    results, _ = _dispatch(router, ["delete row 1", "delete row 1", "delete row 2"])
+    assert router.batched == [["delete row 1", "delete row 2"]]
+    assert [r.row for r in results] == [1, 1, 2]
+    assert results[0] is not results[1]
+    results[0].limit = 5
+    assert results[1].limit is None
@@ -0,0 +1,55 @@
+import pytest
+
+from utils.intent_cache import IntentCache, normalize_command
+from utils.models import Action, DBCommand, Operator
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("Delete product Two!", "delete product 2"),
+    ("delete  product 2", "delete product 2"),
+    ("twenty one items", "21 items"),
+    ("one hundred and five", "105"),
+    ("two thousand and twenty", "2020"),
+    ("one two and three", "1 2 and 3"),
+    ("Price is $1,250.50?", "price is 1 250.50"),
+])
+def test_normalize_words_and_numbers(command, expected):
+    assert normalize_command(command) == expected
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("price > -5", "price > -5"),
+    ("price > −5", "price > -5"),  # minus sign
+    ("price > - 5", "price > -5"),
+    ("delete rows 4-6", "delete rows 4-6"),
+    ("delete rows 4–6", "delete rows 4-6"),  # en dash
+    ("delete rows 4 - 6", "delete rows 4-6"),
+    ("show t-shirt", "show t shirt"),
+])
+def test_normalize_keeps_signs_and_ranges(command, expected):
+    assert normalize_command(command) == expected
+
+
+def test_negative_and_range_do_not_share_keys_with_positives():
+    assert normalize_command("price > −5") != normalize_command("price > 5")
+    assert normalize_command("delete rows 4 - 6") != normalize_command("delete rows 4 6")
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("Search for Café", "search for café"),
+    ("search for cafe\u0301", "search for caf\u00e9"),  # decomposed accent
+    ("Naïve Über Straße", "naïve über straße"),
+    ("поиск стол", "поиск стол"),
+])
+def test_normalize_keeps_non_ascii_letters(command, expected):
+    assert normalize_command(command) == expected
+
+
+def test_cache_skips_case_sensitive_results():
+    cache = IntentCache(max_size=8)
+    exact = DBCommand(action=Action.filters, field="name", operator=Operator.eq, value="Oak Desk")
+    substring = DBCommand(action=Action.filters, field="name", operator=Operator.like, value="oak")
+    cache.put("show product named Oak Desk", exact)
+    cache.put("products named like oak", substring)
+    assert cache.get("show product named oak desk") is None
+    assert cache.get("Products named like OAK") == substring
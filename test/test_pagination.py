@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+from db.db import compound_query, decode_cursor, encode_cursor, next_cursor, sort_query
+
+# Sort values with NULLs and ties, so pages break inside runs of equal keys
+ROWS = [
+    (1, "Lamp", "Kitchen", None, 5, 20.0),
+    (2, "Desk", "Furniture", "red", None, 120.0),
+    (3, "Chair", "Furniture", "blue", 7, None),
+    (4, None, "Books", "red", 7, 20.0),
+    (5, "Shelf", "Furniture", None, None, 80.0),
+    (6, "Table", "Kitchen", "red", 2, None),
+    (7, None, "Toys", "green", 7, 20.0),
+    (8, "Stool", "Furniture", "red", None, 45.5),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, category TEXT, "
+                 "color TEXT, quantity INTEGER, price REAL)")
+    conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)", ROWS)
+    yield conn
+    conn.close()
+
+
+def _pages(conn, build, field, limit):
+    """Ids of every page, following next_cursor until the last page"""
+    pages, after = [], None
+    while True:
+        rows = conn.execute(*build(limit=limit, after=after)).fetchall()
+        pages.append([row["id"] for row in rows])
+        after = next_cursor(rows, limit, field)
+        if after is None:
+            return pages
+
+
+@pytest.mark.parametrize("field", ["id", "name", "color", "quantity", "price"])
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_sort_pages_cover_every_row_once(conn, field, descending, limit):
+    def build(**page):
+        return sort_query(field, descending, **page)
+    expected = [row["id"] for row in conn.execute(*build())]
+    pages = _pages(conn, build, field, limit)
+    assert [i for page in pages for i in page] == expected
+    assert all(len(page) <= limit for page in pages)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_compound_pages_cover_every_match_once(conn, descending):
+    where = {"logic": "or", "conditions": [
+        {"field": "category", "operator": "=", "value": "Furniture"},
+        {"field": "color", "operator": "=", "value": "red"},
+    ]}
+
+    def build(**page):
+        return compound_query(where, "quantity", descending, **page)
+    expected = [row["id"] for row in conn.execute(*build())]
+    assert sorted(expected) == [2, 3, 4, 5, 6, 8]
+    pages = _pages(conn, build, "quantity", 2)
+    assert [i for page in pages for i in page] == expected
+
+
+def test_cursor_round_trips_null_values():
+    token = encode_cursor({"id": 5, "color": None}, "color")
+    assert decode_cursor(token, "color") == (None, 5)
+
+
+def test_cursor_is_bound_to_its_sort_field():
+    token = encode_cursor({"id": 5, "price": 80.0}, "price")
+    with pytest.raises(ValueError):
+        decode_cursor(token, "quantity")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "price")
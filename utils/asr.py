@@ -0,0 +1,86 @@
+import os
+
+# *******************************
+# Speech-to-text backends
+# Each backend loads one model and exposes transcribe(audio, lang, prompt) -> str
+# for 16 kHz float32 PCM. The heavy imports happen in __init__, so only the
+# configured engine is ever loaded.
+# - whisper: openai-whisper (PyTorch)
+# - faster-whisper: CTranslate2 with int8 weights by default, several times
+#   faster than fp32 PyTorch on CPU for a small loss in accuracy
+
+class WhisperBackend:
+    name = "whisper"
+
+    def __init__(self, model_size="base", device="cpu", threads=0, beam_size=None, compute_type=None):
+        import torch
+        import whisper
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = whisper.load_model(model_size, device=device)
+        self.options = {"task": "transcribe", "fp16": device != "cpu"}
+        if beam_size and beam_size > 1:
+            self.options["beam_size"] = beam_size
+        elif not ASR_TEMPERATURE_FALLBACK:
+            # Greedy: one decoding pass, no re-decoding at higher temperatures
+            self.options["temperature"] = 0.0
+
+    def transcribe(self, audio, lang="en", prompt=None):
+        result = self.model.transcribe(audio, language=lang, initial_prompt=prompt, **self.options)
+        return result["text"]
+
+
+class FasterWhisperBackend:
+    name = "faster-whisper"
+
+    def __init__(self, model_size="base", device="cpu", threads=0, beam_size=None, compute_type=None):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type or "int8",
+            cpu_threads=threads or 0,
+        )
+        self.beam_size = beam_size or 1
+
+    def transcribe(self, audio, lang="en", prompt=None):
+        # Silence is already trimmed by utils.utils, so faster-whisper's own VAD stays off
+        segments, _ = self.model.transcribe(
+            audio,
+            language=lang,
+            task="transcribe",
+            beam_size=self.beam_size,
+            temperature=[0.0, 0.2, 0.4, 0.6, 0.8, 1.0] if ASR_TEMPERATURE_FALLBACK else 0.0,
+            initial_prompt=prompt,
+            vad_filter=False,
+        )
+        return "".join(segment.text for segment in segments)
+
+
+BACKENDS = {
+    "whisper": WhisperBackend,
+    "faster-whisper": FasterWhisperBackend,
+}
+
+# Defaults, overridable per call
+ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")
+ASR_THREADS = int(os.getenv("ASR_THREADS", "0"))          # 0: the engine's default
+ASR_BEAM_SIZE = int(os.getenv("ASR_BEAM_SIZE", "0")) or None  # None: greedy decoding
+ASR_COMPUTE_TYPE = os.getenv("ASR_COMPUTE_TYPE") or None  # e.g. int8, int8_float32, float32
+# Re-decode at higher temperatures when the output looks degenerate. Commands
+# are short and prompted with the domain vocabulary, so greedy is the default.
+ASR_TEMPERATURE_FALLBACK = os.getenv("ASR_TEMPERATURE_FALLBACK", "0") == "1"
+
+
+def load_backend(name=None, model_size="base", device="cpu", threads=None, beam_size=None, compute_type=None):
+    """Instantiate a transcription backend (loads its model)"""
+    name = name or ASR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}'. Available: {list(BACKENDS)}")
+    return BACKENDS[name](
+        model_size=model_size,
+        device=device,
+        threads=ASR_THREADS if threads is None else threads,
+        beam_size=beam_size or ASR_BEAM_SIZE,
+        compute_type=compute_type or ASR_COMPUTE_TYPE,
+    )
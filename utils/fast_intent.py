@@ -0,0 +1,265 @@
+import re
+import threading
+from typing import Optional
+from utils.models import Action, Operator, DBCommand, CATEGORIES, COLORS
+from utils.intent_cache import normalize_command
+
+# *******************************
+# Rule-based fast path for get_intent
+# Deterministic patterns for the common phrasings of every Action/Operator.
+# parse_command() returns None when nothing matches, and the caller falls
+# back to the LLM.
+
+FIELDS = {
+    "id": "id", "name": "name", "category": "category",
+    "color": "color", "colour": "color",
+    "quantity": "quantity", "qty": "quantity", "stock": "quantity", "amount": "quantity",
+    "price": "price", "cost": "price",
+}
+
+# Longest phrases first so "greater than or equal to" wins over "greater than"
+OPERATOR_PHRASES = [
+    ("greater than or equal to", Operator.gte), ("more than or equal to", Operator.gte),
+    ("less than or equal to", Operator.lte), ("not equal to", Operator.neq),
+    ("at least", Operator.gte), ("no less than", Operator.gte),
+    ("at most", Operator.lte), ("no more than", Operator.lte),
+    ("greater than", Operator.gt), ("more than", Operator.gt), ("higher than", Operator.gt),
+    ("bigger than", Operator.gt), ("larger than", Operator.gt),
+    ("less than", Operator.lt), ("lower than", Operator.lt), ("smaller than", Operator.lt),
+    ("cheaper than", Operator.lt), ("fewer than", Operator.lt),
+    ("equal to", Operator.eq), ("is not", Operator.neq), ("not", Operator.neq),
+    ("above", Operator.gt), ("over", Operator.gt), ("below", Operator.lt), ("under", Operator.lt),
+    ("equals", Operator.eq), ("is", Operator.eq), ("of", Operator.eq),
+    ("containing", Operator.like), ("contains", Operator.like),
+    ("includes", Operator.like), ("like", Operator.like),
+    (">=", Operator.gte), ("<=", Operator.lte), ("!=", Operator.neq),
+    (">", Operator.gt), ("<", Operator.lt), ("=", Operator.eq),
+]
+
+# Spoken forms of the categories ("books", "book", "clothes", ...)
+CATEGORY_WORDS = {}
+for _category in CATEGORIES:
+    _word = _category.lower()
+    CATEGORY_WORDS[_word] = _category
+    CATEGORY_WORDS[_word.rstrip("s")] = _category
+CATEGORY_WORDS["clothes"] = "Clothing"
+
+_FIELD = "(?:" + "|".join(FIELDS) + ")"
+_OPERATOR = "(?:" + "|".join(re.escape(phrase) for phrase, _ in OPERATOR_PHRASES) + ")"
+_IDS = r"\d+(?:\s+(?:and\s+)?\d+)*"
+_NOUN = r"(?:products?|items?|rows?|entries|entry)"
+_ID_PREFIX = r"(?:(?:with\s+)?(?:id|number)\s+)?"
+
+_STATS = re.compile(r"\b(?:stats|statistics|statistic|overview|summary|summarize|summarise|kpi|kpis|metrics)\b")
+# A stats keyword in a write ("rename product 3 to summary") is a value, not a request for stats
+_WRITE_VERB = re.compile(r"^(?:update|change|set|modify|rename|delete|remove|drop|erase|create|add|insert"
+                         r"|copy|duplicate|replicate|clone)\b")
+# Normalization keeps signs and ranges on their numbers ("> -5", "rows 4-6"); the
+# patterns below have no grammar for them, so "rows 4-6" would read as [4, 6]
+_SIGNED_OR_RANGE = re.compile(r"-\d")
+_READ_ALL = re.compile(
+    r"^(?:show|list|read|display|get|view|give)(?:\s+me)?(?:\s+all)?(?:\s+the)?"
+    r"(?:\s+(?:products?|items?|rows?|everything|inventory|database|table))?"
+    r"(?:\s+in\s+the\s+(?:database|table|inventory))?$"
+)
+_READ_IDS = re.compile(
+    rf"^(?:show|read|get|display|view|find)(?:\s+me)?(?:\s+the)?\s+{_NOUN}\s+{_ID_PREFIX}(?P<ids>{_IDS})$"
+)
+_DELETE = re.compile(
+    rf"^(?:delete|remove|drop|erase)(?:\s+the)?\s+{_NOUN}\s+{_ID_PREFIX}(?P<ids>{_IDS})"
+    r"(?:\s+from\s+the\s+(?:table|database|inventory))?$"
+)
+_REPLICATE = re.compile(
+    rf"^(?:copy|duplicate|replicate|clone)(?:\s+the)?\s+{_NOUN}\s+{_ID_PREFIX}(?P<ids>{_IDS})"
+    r"(?:\s+once|\s+twice|\s+(?P<times>\d+)\s+times)?$"
+)
+_SORT = re.compile(
+    rf"^(?:sort|order|rank)(?:\s+all)?(?:\s+the)?(?:\s+{_NOUN})?\s+by\s+(?P<field>{_FIELD})"
+    r"(?:\s+(?:in\s+)?(?P<direction>ascending|descending|asc|desc|reverse|increasing|decreasing"
+    r"|highest\s+first|lowest\s+first|high\s+to\s+low|low\s+to\s+high)(?:\s+order)?)?$"
+)
+_FILTER = re.compile(
+    rf"^(?:(?:find|show|list|get|display|filter|search)(?:\s+me)?(?:\s+all)?(?:\s+the)?\s+)?"
+    rf"(?:{_NOUN}\s+)?(?:(?:with|where|whose|having)\s+)?(?:(?:a|the)\s+)?"
+    rf"(?P<field>{_FIELD})\s+(?:is\s+)?(?P<operator>{_OPERATOR})\s+(?P<value>.+)$"
+)
+_SINGLE_VALUE_FILTER = re.compile(
+    r"^(?:(?:find|show|list|get|display|filter)(?:\s+me)?(?:\s+all)?(?:\s+the)?\s+)?"
+    rf"(?:{_NOUN}\s+(?:in|from|of)\s+(?:the\s+)?)?(?P<value>[a-z]+)"
+    rf"(?:\s+(?:{_NOUN}|category))?$"
+)
+_SEARCH = re.compile(
+    r"^(?:search|look\s+up|lookup)(?:\s+for)?(?:\s+(?:products?|items?))?(?:\s+(?:named|called))?"
+    r"(?:\s+(?:a|an|the))?\s+(?P<value>.+)$"
+)
+_UPDATE = re.compile(
+    rf"^(?:update|change|set|modify)(?:\s+the)?(?:\s+(?P<field1>{_FIELD})\s+of)?\s+(?:product|row|item)\s+{_ID_PREFIX}(?P<id>\d+)"
+    rf"(?:\s+(?:set\s+)?(?:the\s+|its\s+)?(?P<field2>{_FIELD}))?\s+to\s+(?P<value>.+)$"
+)
+_CREATE = re.compile(
+    r"^\s*(?:create|add|insert)\b(?:\s+a\b)?(?:\s+new\b)?(?:\s+(?:product|item|row)\b)?\s*:?\s*"
+    r"(?P<name>[^,]+),\s*(?P<category>[^,]+),\s*(?P<color>[^,]+),\s*"
+    r"(?P<quantity>\d+),\s*\$?(?P<price>\d+(?:\.\d+)?)\s*[.!]?\s*$",
+    re.IGNORECASE
+)
+_NUMBER = re.compile(r"^(?P<number>\d+(?:\.\d+)?)(?:\s+(?:dollars?|bucks|euros?|units?|items?|pieces?))?$")
+_DESCENDING = {"descending", "desc", "reverse", "decreasing", "highest first", "high to low"}
+
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def _ids(text):
+    ids = [int(i) for i in re.findall(r"\d+", text)]
+    return ids[0] if len(ids) == 1 else ids
+
+
+def _operator(phrase):
+    for candidate, operator in OPERATOR_PHRASES:
+        if candidate == phrase:
+            return operator
+    return None
+
+
+def _field_value(field, value, original=None):
+    """Typed value for a field, or None when it cannot be resolved locally"""
+    if field in ("id", "quantity", "price"):
+        match = _NUMBER.match(value)
+        if not match:
+            return None
+        return float(match.group("number"))
+    if field == "category":
+        return CATEGORY_WORDS.get(value)
+    if field == "color":
+        return value if re.fullmatch(r"[a-z]+", value) else None
+    if field == "name":
+        # Names keep the user's spelling, which only the original text has
+        if original is None:
+            return value
+        parts = re.split(r"\bto\b", original, maxsplit=1, flags=re.IGNORECASE)
+        return parts[1].strip(" \t.!?\"'") if len(parts) == 2 else None
+    return None
+
+
+def _parse(text, original):
+    # CREATE (comma-separated, parsed on the original text to keep the name's case)
+    match = _CREATE.match(original)
+    if match:
+        category = CATEGORY_WORDS.get(match.group("category").strip().lower())
+        if category is None:
+            return None
+        return DBCommand(action=Action.create, value={
+            "name": match.group("name").strip(),
+            "category": category,
+            "color": match.group("color").strip().lower(),
+            "quantity": int(match.group("quantity")),
+            "price": float(match.group("price")),
+        })
+
+    # Ranges and negative numbers: defer them
+    if _SIGNED_OR_RANGE.search(text):
+        return None
+
+    # READ
+    if _READ_ALL.match(text):
+        return DBCommand(action=Action.read)
+    match = _READ_IDS.match(text)
+    if match:
+        return DBCommand(action=Action.read, row=_ids(match.group("ids")))
+
+    # DELETE
+    match = _DELETE.match(text)
+    if match:
+        return DBCommand(action=Action.delete, row=_ids(match.group("ids")))
+
+    # REPLICATE
+    match = _REPLICATE.match(text)
+    if match:
+        times = 2 if text.endswith("twice") else int(match.group("times") or 1)
+        return DBCommand(action=Action.replicate, row=_ids(match.group("ids")),
+                         count=times if times > 1 else None)
+
+    # SORT
+    match = _SORT.match(text)
+    if match:
+        direction = match.group("direction")
+        return DBCommand(
+            action=Action.sort,
+            field=FIELDS[match.group("field")],
+            value="desc" if direction in _DESCENDING else "asc",
+        )
+
+    # UPDATE
+    match = _UPDATE.match(text)
+    if match:
+        field = match.group("field1") or match.group("field2")
+        if not field or FIELDS[field] == "id":
+            return None
+        field = FIELDS[field]
+        value = _field_value(field, match.group("value"), original)
+        if value is None:
+            return None
+        return DBCommand(action=Action.update, row=int(match.group("id")), field=field, value=value)
+
+    # STATS (after the writes, so a stats word used as a value is never read as stats)
+    if _STATS.search(text) and len(text.split()) <= 6 and not _WRITE_VERB.match(text):
+        return DBCommand(action=Action.stats)
+
+    # FILTER: "<field> <operator> <value>"
+    match = _FILTER.match(text)
+    if match:
+        field = FIELDS[match.group("field")]
+        operator = _operator(match.group("operator"))
+        value = match.group("value")
+        if field == "name":
+            # Exact names need the original casing; substring matches don't
+            if operator != Operator.like:
+                return None
+        else:
+            value = _field_value(field, value)
+            if value is None:
+                return None
+            if operator == Operator.like and field in ("id", "quantity", "price"):
+                return None
+        return DBCommand(action=Action.filters, field=field, operator=operator, value=value)
+
+    # FILTER: "show all furniture products", "red products"
+    match = _SINGLE_VALUE_FILTER.match(text)
+    if match:
+        word = match.group("value")
+        if word in CATEGORY_WORDS:
+            return DBCommand(action=Action.filters, field="category", operator=Operator.eq,
+                             value=CATEGORY_WORDS[word])
+        if word in COLORS:
+            return DBCommand(action=Action.filters, field="color", operator=Operator.eq, value=word)
+
+    # SEARCH: "search for oak chair", "look up lamp"
+    match = _SEARCH.match(text)
+    if match:
+        return DBCommand(action=Action.search, value=match.group("value"))
+
+    return None
+
+
+def parse_command(command: str) -> Optional[DBCommand]:
+    """DBCommand for a common phrasing, or None to defer to the LLM"""
+    global _hits, _misses
+    result = _parse(normalize_command(command), command)
+    with _lock:
+        if result is None:
+            _misses += 1
+        else:
+            _hits += 1
+    return result
+
+
+def fast_path_stats():
+    """How often the rule-based parser resolved a command without the LLM"""
+    with _lock:
+        total = _hits + _misses
+        return {
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# *******************************
+# Micro-batching of model intent requests
+# Commands arriving within a short window are sent as one numbered prompt, so
+# the instruction block and examples are paid once per batch instead of once
+# per command. Commands go out as a JSON array of {id, command} and every
+# result must echo its id: a reply with a missing, duplicate or unknown id is
+# rejected whole, so a result can never reach another command's caller. A
+# result that does not parse is retried alone.
+
+class IntentBatcher:
+    """
+    - router: IntentRouter (parse for single commands, complete for batches)
+    - batch_prompt: PromptTemplate with a `commands` variable
+    - parser: single-command output parser, applied to each batch entry
+    - window_ms: how long the first command of a batch waits for others (0 disables batching)
+    - max_batch: commands per model call
+    """
+
+    def __init__(self, router, batch_prompt, parser, window_ms=5.0, max_batch=16):
+        self.router = router
+        self.batch_prompt = batch_prompt
+        self.parser = parser
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.batched = 0
+        self.singles = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="intent-batch")
+        self._worker = None
+
+    @property
+    def enabled(self):
+        return self.window > 0 and self.max_batch > 1
+
+    def submit(self, command):
+        """Future resolved with the DBCommand of `command`"""
+        future = Future()
+        self._start()
+        self._queue.put((command, future))
+        return future
+
+    def parse(self, command):
+        if not self.enabled:
+            return self.router.parse(command)
+        return self.submit(command).result()
+
+    async def aparse(self, command):
+        if not self.enabled:
+            return await self.router.aparse(command)
+        return await asyncio.wrap_future(self.submit(command))
+
+    def stats(self):
+        with self._lock:
+            calls = self.batches + self.singles
+            return {
+                "enabled": self.enabled,
+                "window_ms": round(self.window * 1000, 1),
+                "max_batch": self.max_batch,
+                "batches": self.batches,
+                "batched_commands": self.batched,
+                "single_calls": self.singles,
+                "fallbacks": self.fallbacks,
+                "mean_batch_size": round(self.batched / self.batches, 2) if self.batches else 0.0,
+                # Commands answered per model call (fallbacks included)
+                "commands_per_call": round((self.batched + self.singles - self.fallbacks) / calls, 2) if calls else 0.0,
+            }
+
+    def _start(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._collect, name="intent-batcher", daemon=True)
+                    self._worker.start()
+
+    def _collect(self):
+        """Gather commands for one window, then hand the batch to the pool"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._pool.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        # Identical commands in a window share one entry
+        waiting = {}
+        for command, future in batch:
+            waiting.setdefault(command, []).append(future)
+        if len(waiting) == 1:
+            command, futures = next(iter(waiting.items()))
+            self._single(command, futures)
+            return
+
+        commands = list(waiting)
+        try:
+            entries = self._complete(commands)
+        except Exception as e:
+            print(f"❌ Batched intent extraction failed, retrying one by one: {e}")
+            entries = {}
+        with self._lock:
+            self.batches += 1
+            self.batched += len(commands)
+
+        for index, command in enumerate(commands, 1):
+            futures = waiting[command]
+            entry = entries.get(index)
+            try:
+                result = self.parser.parse(json.dumps(entry)) if entry is not None else None
+            except Exception:
+                result = None
+            if result is None:
+                with self._lock:
+                    self.fallbacks += 1
+                self._pool.submit(self._single, command, futures)
+                continue
+            _resolve(futures, result)
+
+    def _complete(self, commands):
+        """Raw entries of one batched call keyed on command id (1-based)"""
+        # JSON-encoded, so a newline or "2. ..." inside a command stays inside its string
+        payload = json.dumps([{"id": i, "command": c} for i, c in enumerate(commands, 1)], ensure_ascii=False)
+        text = self.router.complete(self.batch_prompt.format(commands=payload))
+        text = text.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+        reply = json.loads(text)
+        results = reply.get("results") if isinstance(reply, dict) else reply
+        if not isinstance(results, list):
+            raise ValueError("reply has no results list")
+        if len(results) != len(commands):
+            raise ValueError(f"{len(results)} results for {len(commands)} commands")
+
+        entries = {}
+        for result in results:
+            if not isinstance(result, dict):
+                raise ValueError("result is not an object")
+            result = dict(result)
+            index = result.pop("id", None)
+            if type(index) is not int or not 1 <= index <= len(commands):
+                raise ValueError(f"result with unknown id {index!r}")
+            if index in entries:
+                raise ValueError(f"duplicate result for id {index}")
+            entries[index] = result
+        return entries
+
+    def _single(self, command, futures):
+        with self._lock:
+            self.singles += 1
+        try:
+            result = self.router.parse(command)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        _resolve(futures, result)
+
+
+def _resolve(futures, result):
+    """Give every caller its own copy: callers set cursor/limit on the command"""
+    for future in futures:
+        future.set_result(result.model_copy(deep=True) if hasattr(result, "model_copy") else result)
+
+
+def batcher_from_env(router, batch_prompt, parser):
+    """Batcher with INTENT_BATCH_WINDOW_MS (0 disables) and INTENT_BATCH_MAX"""
+    return IntentBatcher(
+        router,
+        batch_prompt,
+        parser,
+        window_ms=float(os.getenv("INTENT_BATCH_WINDOW_MS", "5")),
+        max_batch=int(os.getenv("INTENT_BATCH_MAX", "16")),
+    )
@@ -0,0 +1,235 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from utils.models import Action, DBCommand
+
+# *******************************
+# Transcript normalization
+
+_UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_SCALES = {"hundred": 100, "thousand": 1000, "million": 1000000}
+
+# Words (any script), numbers (with decimals, a leading minus, or a range like
+# 4-6) and comparison operators; everything else (punctuation, currency signs,
+# quotes) is dropped. "price > -5" and "price > 5" must not share a key.
+_TOKEN = re.compile(r"[^\W\d_]+|(?<![^\W_])-?\d+(?:\.\d+)?(?:-\d+(?:\.\d+)?)*|!=|[<>]=?|=")
+# Typographic minus signs and dashes ("−5", "4–6") read as "-"
+_DASHES = str.maketrans({c: "-" for c in "\u2010\u2011\u2012\u2013\u2014\u2015\u2212\ufe63\uff0d"})
+# Spaced signs and ranges ("- 5", "4 - 6") are joined to their number
+_SPACED_MINUS = re.compile(r"(?:(?<=\d)|(?<![\w.]))\s*-\s+(?=\d)|(?<=\d)\s+-(?=\d)")
+# Bumped whenever normalize_command changes, so persisted keys are not reused
+KEY_VERSION = 3
+
+
+def _words_to_numbers(tokens):
+    """
+    Replace number words with digits: "twenty one" -> "21", "two hundred and
+    five" -> "205". Separate numbers stay separate ("one two and three").
+    """
+    out = []
+    total = current = None  # value of the number being read
+    last = None             # kind of the previous number word
+    for token in tokens:
+        if token in _UNITS and last in (None, "tens", "scale"):
+            current = (current or 0) + _UNITS[token]
+            last = "unit"
+        elif token in _TENS and last in (None, "scale"):
+            current = (current or 0) + _TENS[token]
+            last = "tens"
+        elif token in _SCALES and last in ("unit", "tens", "scale"):
+            if _SCALES[token] == 100:
+                current = (current or 1) * 100
+            else:
+                total = (total or 0) + (current or 1) * _SCALES[token]
+                current = None
+            last = "scale"
+        elif token == "and" and last == "scale":
+            continue
+        else:
+            if last is not None:
+                out.append(str((total or 0) + (current or 0)))
+                total = current = last = None
+                if token in _UNITS or token in _TENS:
+                    # A new number starts right after the previous one
+                    current = _UNITS.get(token, _TENS.get(token))
+                    last = "unit" if token in _UNITS else "tens"
+                    continue
+            out.append(token)
+    if last is not None:
+        out.append(str((total or 0) + (current or 0)))
+    return out
+
+
+def normalize_command(text):
+    """
+    Canonical form of a spoken/typed command, used as the cache key.
+    "Delete product Two!" and "delete  product 2" both give "delete product 2".
+    """
+    text = unicodedata.normalize("NFC", text).lower().translate(_DASHES)
+    text = _SPACED_MINUS.sub("-", text)
+    return " ".join(_words_to_numbers(_TOKEN.findall(text)))
+
+
+# *******************************
+# Intent cache
+
+# Create and update carry free-text values (names, colors) whose exact
+# spelling the normalized key no longer holds, so their results are not reused
+CACHEABLE_ACTIONS = {Action.read, Action.delete, Action.filters, Action.sort,
+                     Action.replicate, Action.stats, Action.search}
+
+
+def _case_sensitive(field, operator, value):
+    """
+    Whether a condition compares text case-sensitively: = / != on a free-text
+    field, or LIKE with non-ASCII letters (SQLite only folds ASCII case).
+    The key is lowercased, so such commands would share one entry.
+    """
+    if not isinstance(value, str) or field in (None, "category"):
+        return False
+    operator = getattr(operator, "value", operator)
+    if operator in ("=", "!="):
+        return True
+    return operator == "LIKE" and not value.isascii()
+
+
+def _cacheable(result):
+    if not isinstance(result, DBCommand) or result.action not in CACHEABLE_ACTIONS:
+        return False
+    if _case_sensitive(result.field, result.operator, result.value):
+        return False
+    groups = [result.where] if result.where is not None else []
+    while groups:
+        for condition in groups.pop().conditions:
+            if hasattr(condition, "conditions"):
+                groups.append(condition)
+            elif _case_sensitive(condition.field, condition.operator, condition.value):
+                return False
+    return True
+
+
+class IntentCache:
+    """
+    LRU + TTL cache from normalized command text to DBCommand.
+    - max_size: entries kept in memory
+    - ttl: seconds an entry stays valid (memory and disk)
+    - path: optional SQLite file so entries survive restarts
+    """
+
+    def __init__(self, max_size=1024, ttl=86400, path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored_at, DBCommand)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS intent_cache (
+                    key TEXT PRIMARY KEY,
+                    command TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            # Keys written by an older normalize_command may now collide or miss
+            if self._db.execute("PRAGMA user_version").fetchone()[0] != KEY_VERSION:
+                self._db.execute("DELETE FROM intent_cache")
+                self._db.execute(f"PRAGMA user_version = {KEY_VERSION}")
+            self._db.commit()
+
+    def get(self, command):
+        """Cached DBCommand for this command text, or None"""
+        key = normalize_command(command)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load(key)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    self._forget(key)
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self.hits += 1
+            return entry[1].model_copy(deep=True)
+
+    def put(self, command, result):
+        """Remember the parsed result (cacheable actions without case-sensitive values)"""
+        if not _cacheable(result):
+            return
+        key = normalize_command(command)
+        entry = (time.time(), result.model_copy(deep=True))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO intent_cache (key, command, stored_at) VALUES (?, ?, ?)",
+                    (key, entry[1].model_dump_json(), entry[0])
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM intent_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": self._db is not None,
+            }
+
+    def _load(self, key):
+        row = self._db.execute(
+            "SELECT stored_at, command FROM intent_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return (row[0], DBCommand.model_validate_json(row[1]))
+
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM intent_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def cache_from_env():
+    """Build the cache from INTENT_CACHE_SIZE / INTENT_CACHE_TTL / INTENT_CACHE_PATH"""
+    return IntentCache(
+        max_size=int(os.getenv("INTENT_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("INTENT_CACHE_TTL", "86400")),
+        path=os.getenv("INTENT_CACHE_PATH") or None,
+    )
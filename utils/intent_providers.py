@@ -0,0 +1,205 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# *******************************
+# Intent extraction providers
+# A provider turns a command into a DBCommand with the shared intent prompt
+# and parser (built in utils/tools.py):
+# - ollama: a small model served on this machine (no network, air-gapped)
+# - gemini: Google's hosted model (needs GOOGLE_API_KEY)
+# Clients are created on first use, so a missing key or an unreachable
+# server only disables that provider instead of failing at import.
+
+class OllamaProvider:
+    """Local model through the Ollama HTTP API (OLLAMA_URL, OLLAMA_MODEL)"""
+    name = "ollama"
+
+    def __init__(self, prompt, parser):
+        self.prompt = prompt
+        self.parser = parser
+        self.url = os.getenv("OLLAMA_URL", "http://localhost:11434").rstrip("/")
+        self.model = os.getenv("OLLAMA_MODEL", "qwen2.5:1.5b")
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _http(self):
+        # One pooled session per process (keep-alive to the local server)
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    self._session = requests.Session()
+        return self._session
+
+    def complete(self, text, timeout=None):
+        """Raw JSON completion of a formatted prompt"""
+        response = self._http().post(
+            f"{self.url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": text,
+                "format": "json",
+                "stream": False,
+                "options": {"temperature": 0},
+            },
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return response.json()["response"]
+
+    def parse(self, command, timeout=None):
+        return self.parser.parse(self.complete(self.prompt.format(command=command), timeout))
+
+
+class GeminiProvider:
+    """Hosted Gemini/Gemma model through LangChain (INTENT_LLM_MODEL, INTENT_LLM_TRANSPORT)"""
+    name = "gemini"
+
+    def __init__(self, prompt, parser):
+        self.prompt = prompt
+        self.parser = parser
+        self.model = os.getenv("INTENT_LLM_MODEL", "gemma-3n-e4b-it")
+        self._llm = None
+        self._chain = None
+        self._lock = threading.Lock()
+
+    @property
+    def llm(self):
+        # One client per process: its transport (gRPC channel, or pooled HTTP
+        # session with INTENT_LLM_TRANSPORT=rest) keeps connections alive across calls
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    if not os.getenv("GOOGLE_API_KEY"):
+                        raise RuntimeError("GOOGLE_API_KEY is not set")
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+                    self._llm = ChatGoogleGenerativeAI(
+                        model=self.model,
+                        temperature=0.0,
+                        transport=os.getenv("INTENT_LLM_TRANSPORT") or None,
+                    )
+        return self._llm
+
+    @property
+    def chain(self):
+        if self._chain is None:
+            self._chain = self.prompt | self.llm | self.parser
+        return self._chain
+
+    def complete(self, text, timeout=None):
+        """Raw completion of a formatted prompt"""
+        return self.llm.invoke(text).content
+
+    def parse(self, command, timeout=None):
+        return self.chain.invoke({"command": command})
+
+    async def aparse(self, command):
+        return await self.chain.ainvoke({"command": command})
+
+
+PROVIDERS = {
+    "ollama": OllamaProvider,
+    "gemini": GeminiProvider,
+}
+
+
+# *******************************
+# Router: providers in order, each under a timeout, falling through on error
+
+class IntentRouter:
+    """
+    - providers: tried in order until one returns a result
+    - timeout: seconds allowed per provider
+    """
+
+    def __init__(self, providers, timeout=15.0):
+        if not providers:
+            raise ValueError("At least one intent provider is required")
+        self.providers = providers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="intent-provider")
+        self._lock = threading.Lock()
+        self._stats = {p.name: {"calls": 0, "successes": 0, "errors": 0, "timeouts": 0, "seconds": 0.0}
+                       for p in providers}
+
+    def parse(self, command):
+        """Result of the first provider that answers in time"""
+        return self._first("parse", command)
+
+    def complete(self, text):
+        """Raw completion of an already formatted prompt (e.g. a batch of commands)"""
+        return self._first("complete", text)
+
+    def _first(self, method, arg):
+        errors = []
+        for provider in self.providers:
+            started = time.perf_counter()
+            future = self._pool.submit(getattr(provider, method), arg, self.timeout)
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                self._record(provider, started, "timeouts")
+                errors.append(f"{provider.name}: timed out after {self.timeout}s")
+                continue
+            except Exception as e:
+                self._record(provider, started, "errors")
+                errors.append(f"{provider.name}: {e}")
+                continue
+            self._record(provider, started, "successes")
+            return result
+        raise RuntimeError("No intent provider could parse the command (" + "; ".join(errors) + ")")
+
+    async def aparse(self, command):
+        """parse() for async callers: native async providers are awaited, others run on the pool"""
+        loop = asyncio.get_running_loop()
+        errors = []
+        for provider in self.providers:
+            started = time.perf_counter()
+            if hasattr(provider, "aparse"):
+                job = provider.aparse(command)
+            else:
+                job = loop.run_in_executor(self._pool, provider.parse, command, self.timeout)
+            try:
+                result = await asyncio.wait_for(job, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self._record(provider, started, "timeouts")
+                errors.append(f"{provider.name}: timed out after {self.timeout}s")
+                continue
+            except Exception as e:
+                self._record(provider, started, "errors")
+                errors.append(f"{provider.name}: {e}")
+                continue
+            self._record(provider, started, "successes")
+            return result
+        raise RuntimeError("No intent provider could parse the command (" + "; ".join(errors) + ")")
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {**s, "mean_ms": round(s["seconds"] / s["calls"] * 1000, 1) if s["calls"] else 0.0,
+                       "seconds": round(s["seconds"], 3)}
+                for name, s in self._stats.items()
+            }
+
+    def _record(self, provider, started, outcome):
+        with self._lock:
+            stats = self._stats[provider.name]
+            stats["calls"] += 1
+            stats[outcome] += 1
+            stats["seconds"] += time.perf_counter() - started
+
+
+def router_from_env(prompt, parser):
+    """Router over INTENT_PROVIDERS (comma-separated, in order) with INTENT_TIMEOUT per provider"""
+    names = [n.strip() for n in os.getenv("INTENT_PROVIDERS", "gemini").split(",") if n.strip()]
+    unknown = [n for n in names if n not in PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown intent providers {unknown}. Available: {list(PROVIDERS)}")
+    return IntentRouter(
+        [PROVIDERS[name](prompt, parser) for name in names],
+        timeout=float(os.getenv("INTENT_TIMEOUT", "15")),
+    )
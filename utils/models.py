@@ -1,6 +1,6 @@
 from enum import Enum
 from pydantic import BaseModel
-from typing import Optional, Union, List, Literal
+from typing import Optional, Union, List, Literal, get_args
 
 class Action(str, Enum):
     create = "create"
@@ -11,6 +11,7 @@ class Action(str, Enum):
     sort = "sort"
     replicate = "replicate"
     stats = "stats"
+    search = "search"
 
 class Operator(str, Enum):
     eq = "="
@@ -21,21 +22,49 @@ class Operator(str, Enum):
     neq = "!="
     like = "LIKE"
 
+Category = Literal["Furniture", "Electronics", "Clothing", "Books", "Toys", "Kitchen"]
+CATEGORIES = get_args(Category)
+
+# Colors used by db/create_db.py
+COLORS = ("red", "blue", "green", "black", "white", "orange", "purple")
+
 class Product(BaseModel):
 	name: str
-	category: Optional[Literal["Furniture", "Electronics", "Clothing", "Books", "Toys", "Kitchen"]]
+	category: Optional[Category]
 	color: str
 	quantity: int
 	price: float
 	
+class Condition(BaseModel):
+    field: str
+    operator: Operator
+    value: Union[float, str]
+
+class FilterGroup(BaseModel):
+    """Conditions joined by AND/OR; groups nest, e.g. red AND (Furniture OR Kitchen)"""
+    logic: Literal["and", "or"] = "and"
+    conditions: List[Union[Condition, "FilterGroup"]]
+
 class DBCommand(BaseModel):
     action: Action
     row: Optional[Union[int, List]] = None
     field: Optional[str] = None
-    value: Optional[Union[str, float, Product]] = None
+    value: Optional[Union[str, float, Product, List[Product]]] = None
     operator: Optional[Operator] = None
+    count: Optional[int] = None   # copies per row for replicate
+    where: Optional[FilterGroup] = None  # compound filter, replaces field/operator/value
+    order_by: Optional[str] = None       # sort field of a compound filter
+    descending: Optional[bool] = None
+    limit: Optional[int] = None   # page size for read/filter/sort
+    cursor: Optional[str] = None  # next_cursor of the previous page
     message: Optional[str] = "I just completed you will. Anything else."
 
+class BatchResult(DBCommand):
+    id: int  # id of the command this result answers
+
+class IntentBatch(BaseModel):
+    results: List[BatchResult]  # one per command of a batched prompt
+
 class Status(BaseModel):
 	status: Literal["clear", "unclear"]
 	#message: str
@@ -0,0 +1,130 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SchedulerSaturated(Exception):
+    """Raised when the transcription queue is full"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Transcription queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TranscriptionScheduler:
+    """
+    Bounded job queue served by a fixed pool of inference threads.
+    - workers: number of threads running the model (each job runs on one of them)
+    - max_queue: jobs allowed to wait; submit() raises SchedulerSaturated beyond that
+    - warm_up: optional callable run once per worker before it takes jobs
+    """
+
+    def __init__(self, workers=1, max_queue=8, warm_up=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._warm_up = warm_up
+        self._lock = threading.Lock()
+        self._threads = []
+        self._busy = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker, name=f"transcribe-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) and return a Future for its result"""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((future, time.monotonic(), func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise SchedulerSaturated(self.retry_after()) from None
+        return future
+
+    def retry_after(self):
+        """Rough number of seconds before a queued job would start"""
+        with self._lock:
+            avg_run = self._total_run / self._completed if self._completed else 1.0
+        backlog = self._queue.qsize() + self._busy
+        return max(1, int(round(avg_run * backlog / self.workers)))
+
+    def metrics(self):
+        """Queue depth, wait time and throughput counters"""
+        with self._lock:
+            done = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "busy_workers": self._busy,
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": round(self._total_wait / done, 4) if done else 0.0,
+                "max_wait_seconds": round(self._max_wait, 4),
+                "avg_run_seconds": round(self._total_run / done, 4) if done else 0.0,
+            }
+
+    def _worker(self):
+        if self._warm_up:
+            try:
+                self._warm_up()
+            except Exception as e:
+                print(f"❌ Transcription worker warm-up failed: {e}")
+
+        while True:
+            future, queued_at, func, args, kwargs = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                self._queue.task_done()
+                continue
+
+            started = time.monotonic()
+            wait = started - queued_at
+            with self._lock:
+                self._busy += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+            failed = False
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+                failed = True
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._total_run += time.monotonic() - started
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                self._queue.task_done()
+
+
+def scheduler_from_env(warm_up=None):
+    """Build a scheduler sized from TRANSCRIBE_WORKERS / TRANSCRIBE_MAX_QUEUE"""
+    return TranscriptionScheduler(
+        workers=int(os.getenv("TRANSCRIBE_WORKERS", "1")),
+        max_queue=int(os.getenv("TRANSCRIBE_MAX_QUEUE", "8")),
+        warm_up=warm_up,
+    )
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+import uuid
+
+
+class StreamTooLarge(ValueError):
+    """The session went past its byte or duration cap"""
+
+
+class StreamSession:
+    """
+    Audio received so far for one recording, plus its latest partial transcript.
+    Chunks are MediaRecorder slices: only the concatenation from the first chunk
+    is decodable, so partials always cover the whole stream received so far.
+    """
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.audio = bytearray()
+        self.partial = ""
+        self.partial_bytes = 0       # stream length covered by self.partial
+        self.pending = None          # Future of the partial transcription in flight
+        self.last_partial_at = 0.0
+        self.stable = False          # last two partials were identical
+        self.speculation = None      # (text, Future) of the intent parsed from a stable partial
+        self.partials = 0            # partial transcriptions started
+        self.created_at = self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class StreamRegistry:
+    """
+    Open streaming transcription sessions.
+    - transcribe: callable(bytes) -> str, run on the inference pool
+    - submit: callable(func, *args) -> Future (e.g. TranscriptionScheduler.submit)
+    - partial_interval: minimum seconds between two partial transcriptions
+    - ttl: idle seconds after which a session is dropped
+    - speculate: optional callable(text) -> Future, started once a partial is
+      stable (unchanged by the next partial), e.g. intent parsing
+    - max_bytes / max_seconds: cap on one recording (StreamTooLarge past it)
+    - max_partials: partial transcriptions per session. Each one decodes the
+      whole stream again (slices are not decodable alone), so this bounds the
+      worker time a single recording can take before its final transcription.
+    """
+
+    def __init__(self, transcribe, submit, partial_interval=1.0, ttl=120.0, speculate=None,
+                 max_bytes=4 * 1024 * 1024, max_seconds=60.0, max_partials=8):
+        self.transcribe = transcribe
+        self.submit = submit
+        self.speculate = speculate
+        self.partial_interval = partial_interval
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.max_partials = max_partials
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Start a new session and return its id"""
+        self._purge()
+        session = StreamSession(uuid.uuid4().hex)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session.id
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def append(self, session_id, chunk):
+        """
+        Add a chunk and return the latest partial transcript.
+        Never waits for the model: a new partial is queued when the previous one
+        is done and partial_interval has elapsed, and is returned on a later call.
+        """
+        self._purge()
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+
+        with session.lock:
+            now = time.monotonic()
+            if len(session.audio) + len(chunk) > self.max_bytes or now - session.created_at > self.max_seconds:
+                # The client can no longer finish this stream: drop it
+                self.close(session_id)
+                raise StreamTooLarge(
+                    f"Recording exceeds the stream limit ({self.max_bytes // 1024} KB / {self.max_seconds:g}s)"
+                )
+            session.audio.extend(chunk)
+            session.updated_at = now
+            self._collect(session)
+
+            due = session.updated_at - session.last_partial_at >= self.partial_interval
+            if (session.pending is None and due and session.partials < self.max_partials
+                    and len(session.audio) > session.partial_bytes):
+                audio = bytes(session.audio)
+                session.last_partial_at = session.updated_at
+                session.partials += 1
+                try:
+                    session.pending = (len(audio), self.submit(self.transcribe, audio))
+                except Exception as e:
+                    # Pool saturated: skip this partial, the final result is unaffected
+                    print(f"Partial transcription skipped: {e}")
+
+            return session.partial
+
+    def finish(self, session_id, timeout=None):
+        """Close the session and transcribe the complete stream"""
+        return self.finish_session(session_id, timeout)[0]
+
+    def finish_session(self, session_id, timeout=None):
+        """
+        Close the session and transcribe the complete stream.
+        Returns (transcript, speculation) where speculation is the (text, Future)
+        started from a stable partial, or None.
+        """
+        self._purge()
+        session = self.close(session_id)
+        if session is None:
+            raise KeyError(session_id)
+
+        with session.lock:
+            self._collect(session)
+            audio = bytes(session.audio)
+            speculation = session.speculation
+            if session.partial_bytes == len(audio):
+                return session.partial, speculation
+            pending = session.pending
+
+        if not audio:
+            return "", speculation
+        if pending is not None and pending[0] == len(audio):
+            # The partial in flight already covers the whole stream
+            return pending[1].result(timeout=timeout), speculation
+        return self.submit(self.transcribe, audio).result(timeout=timeout), speculation
+
+    def _collect(self, session):
+        """Pick up a finished partial transcription (session.lock held)"""
+        if session.pending is None:
+            return
+        length, future = session.pending
+        if not future.done():
+            return
+        session.pending = None
+        try:
+            partial = future.result()
+        except Exception as e:
+            # A truncated container can fail to decode; the next chunk retries
+            print(f"Partial transcription failed: {e}")
+            return
+        session.stable = partial.strip() != "" and partial == session.partial
+        session.partial = partial
+        session.partial_bytes = length
+        self._speculate(session)
+
+    def _speculate(self, session):
+        """Start speculative work on a stable partial (session.lock held)"""
+        if self.speculate is None or not session.stable:
+            return
+        if session.speculation is not None and session.speculation[0] == session.partial:
+            return
+        try:
+            session.speculation = (session.partial, self.speculate(session.partial))
+        except Exception as e:
+            print(f"Speculation skipped: {e}")
+
+    def _purge(self):
+        """Drop sessions idle for longer than ttl"""
+        now = time.monotonic()
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if now - session.updated_at > self.ttl:
+                    del self._sessions[session_id]
+
+
+def registry_from_env(transcribe, submit, speculate=None):
+    """
+    Build a registry tuned from STREAM_PARTIAL_INTERVAL / STREAM_SESSION_TTL /
+    STREAM_MAX_MB / STREAM_MAX_SECONDS / STREAM_MAX_PARTIALS
+    """
+    return StreamRegistry(
+        transcribe,
+        submit,
+        partial_interval=float(os.getenv("STREAM_PARTIAL_INTERVAL", "1.0")),
+        ttl=float(os.getenv("STREAM_SESSION_TTL", "120")),
+        speculate=speculate,
+        max_bytes=int(float(os.getenv("STREAM_MAX_MB", "4")) * 1024 * 1024),
+        max_seconds=float(os.getenv("STREAM_MAX_SECONDS", "60")),
+        max_partials=int(os.getenv("STREAM_MAX_PARTIALS", "8")),
+    )
@@ -1,32 +1,27 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from langchain.output_parsers import PydanticOutputParser
 from utils.utils import transcribe_audio
-from utils.models import Action, DBCommand, Product, Status
+from utils.models import Action, DBCommand, IntentBatch, Product, Status
 from typing import Union
+from utils.intent_cache import cache_from_env
+from utils.fast_intent import parse_command
+from utils.intent_providers import router_from_env
+from utils.intent_batcher import batcher_from_env
 from db.db import create, update, read, delete, filters, sort, replicate, get_overall_stats, get_category_stats
+from db.db import create_many, update_many, delete_many, replicate_many
+from db.db import filter_query, sort_query, read_query, explain_query_plan, next_cursor, iter_batches
+from db.db import compound_filters, compound_query, search, search_query
 from dotenv import load_dotenv
 
 # *******************************
-# Gemini API key
-if "GOOGLE_API_KEY" not in os.environ:
-	os.environ["GOOGLE_API_KEY"] = "YOUR_GOOGLE_API_KEY"
-elif:
-	os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
-else:
-	os.environ["GOOGLE_API_KEY"] = input("Enter your Google API KEY (get it from https://aistudio.google.com/)\n: ")
+# Provider settings (GOOGLE_API_KEY, INTENT_PROVIDERS, ...) from the
+# environment or a .env file
+load_dotenv()
 
-
-#instantiate gemini
-llm = ChatGoogleGenerativeAI(model="gemma-3n-e4b-it", temperature=0.0)
-
-def get_intent(command: str) -> Union[Status, DBCommand, dict]:
-    parser = PydanticOutputParser(pydantic_object=DBCommand)
-    prompt = PromptTemplate(
-        input_variables=["command"],
-        template="""
+# *******************************
+# Intent extraction prompt and parser, shared by all providers and threads
+INTENT_RULES = """
         You are a helpful assistant that extracts structured database commands from natural language.
         
         The database consists of a products table with fields: id (int), name (text), category (Furniture, Electronics, Clothing, Books, Toys, Kitchen), color (red, blue, etc.), quantity (int), and price (float). All user queries should map to valid operations on this structure.
@@ -36,37 +31,140 @@ def get_intent(command: str) -> Union[Status, DBCommand, dict]:
         - Never use strings like colors, names, or labels as the `row` value.
         - If no row is specified, `row` should be None.
         - The `message` should a simple sentence to say what you have done, don't include any external link.
-        - The `action` must be one of: create, read, update, delete, filter, sort, replicate, stats.
+        - The `action` must be one of: create, read, update, delete, filter, sort, replicate, stats, search.
+        - Use search when the user looks a product up by (part of) its name or by free words rather than a field condition: `value` is the search text, `field` and `operator` are None.
         - If `action` is stats, then `row`, `field`, `operator`, and `value` should all be None.
-        - If `action` is create, then `row`, `field` and `operator` should be None, and then value should be a dictionary with these entries: name, category, color, quantity and price. 
+        - If `action` is create, then `row`, `field` and `operator` should be None, and then value should be a dictionary with these entries: name, category, color, quantity and price. Several products to create → a list of such dictionaries.
+        - `count` is how many copies a replicate makes (e.g. "three times" → count=3), otherwise None.
         - The `operator` must be one of: =, <, <=, >, >=, !=, LIKE, None.
         - For filter action, `field` can be: id, name, category, color, quantity, price. While rendering a category, make it matches the existing categories.
+        - When a filter has several conditions, or a filter is combined with a sort, put the conditions in `where` (`logic` is "and" or "or", groups can nest) and leave `field`, `operator` and `value` None. `order_by` is the sort field and `descending` is true for descending order.
+        - `limit` is the number of products the user asks to see (e.g. "show 5 products" → limit=5), otherwise None. `cursor` must always be None.
 
         Examples:
         - "show all products" → action="read"
 		- "create product iPhone 13, Electronics, Blue, 5, 999" → action="create"
 		- "update product 1 name to iPhone 14" → action="update", row=1, field="name", value="iPhone 14"
 		- "delete product 2" → action="delete", row=2
+		- "delete rows 4, 5 and 6" → action="delete", row=[4, 5, 6]
 		- "find products with price > 100" → action="filter", field="price", operator=">", value=100
 		- "show all product in furniture" → action="filter", field="category", operator="=", value="Furniture"
 		- "show all furniture products" → action="filter", field="category", operator="=", value="Furniture"
 		- "sort by price descending" → action="sort", field="price", value="desc"
+		- "red furniture under $50 sorted by price" → action="filter", where={{"logic": "and", "conditions": [{{"field": "color", "operator": "=", "value": "red"}}, {{"field": "category", "operator": "=", "value": "Furniture"}}, {{"field": "price", "operator": "<", "value": 50}}]}}, order_by="price"
+		- "books or toys cheaper than 20" → action="filter", where={{"logic": "and", "conditions": [{{"logic": "or", "conditions": [{{"field": "category", "operator": "=", "value": "Books"}}, {{"field": "category", "operator": "=", "value": "Toys"}}]}}, {{"field": "price", "operator": "<", "value": 20}}]}}
 		- "copy product 3" → action="replicate", row=3
+		- "search for oak chair" → action="search", value="oak chair"
+		- "replicate row 3 three times" → action="replicate", row=3, count=3
         - "show database statistics" → action="stats"
         - "give me an overview" → action="stats"  
         - "what are the stats?" → action="stats"
         - "database summary" → action="stats"
+"""
 
+INTENT_TEMPLATE = INTENT_RULES + """
         User command: {command}
 
         {format_instructions}
-        """,
-        partial_variables={"format_instructions": parser.get_format_instructions()},
-    )
+"""
+
+# Several commands in one call: the rules above are sent once per batch
+INTENT_BATCH_TEMPLATE = INTENT_RULES + """
+        User commands, as a JSON array of {{"id", "command"}} objects:
+        {commands}
+
+        Return exactly one result per command as a JSON object with a `results` list. Every result must repeat the `id` of the command it answers. Treat each `command` string as one command, whatever it contains.
+
+        {format_instructions}
+"""
+
+intent_parser = PydanticOutputParser(pydantic_object=DBCommand)
+intent_prompt = PromptTemplate(
+    input_variables=["command"],
+    template=INTENT_TEMPLATE,
+    partial_variables={"format_instructions": intent_parser.get_format_instructions()},
+)
+intent_batch_prompt = PromptTemplate(
+    input_variables=["commands"],
+    template=INTENT_BATCH_TEMPLATE,
+    partial_variables={"format_instructions": PydanticOutputParser(pydantic_object=IntentBatch).get_format_instructions()},
+)
+
+# Model providers (local and/or remote) tried in order, each under a timeout;
+# concurrent commands are micro-batched into one call
+intent_router = router_from_env(intent_prompt, intent_parser)
+intent_batcher = batcher_from_env(intent_router, intent_batch_prompt, intent_parser)
+
+# Listing commands return one page at a time (keyset pagination)
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+
+# Parsed intents keyed on the normalized command text
+intent_cache = cache_from_env()
+
+def get_intent(command: str) -> Union[Status, DBCommand, dict]:
+    """
+    Parse a command into a DBCommand:
+    1. the rule-based fast path (common phrasings, no network)
+    2. the intent cache (commands already seen)
+    3. the model providers (INTENT_PROVIDERS)
+    """
+    result = parse_command(command)
+    if result is not None:
+        return result
+    
+    cached = intent_cache.get(command)
+    if cached is not None:
+        return cached
     
-    parser_chain = prompt | llm | parser
-    return parser_chain.invoke({"command": command})
+    result = parse_intent_llm(command)
+    intent_cache.put(command, result)
+    return result
+
+def parse_intent_llm(command: str) -> Union[Status, DBCommand, dict]:
+    """Extract the DBCommand with the model providers (batched with concurrent commands)"""
+    return intent_batcher.parse(command)
+
+async def aget_intent(command: str) -> Union[Status, DBCommand, dict]:
+    """get_intent for async callers: the batched provider call is awaited, not blocked on"""
+    result = parse_command(command)
+    if result is not None:
+        return result
+    
+    cached = intent_cache.get(command)
+    if cached is not None:
+        return cached
+    
+    result = await intent_batcher.aparse(command)
+    intent_cache.put(command, result)
+    return result
+
+
 
+def page_size(limit=None) -> int:
+    """Requested page size, defaulted and capped"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+def is_descending(value) -> bool:
+    """Whether a sort command's value asks for descending order"""
+    return bool(value) and str(value).lower() in ['desc', 'descending', 'reverse']
+
+def compound_where(cmd: DBCommand):
+    """
+    Condition tree (plain dict) of a filter command that needs compound_filters:
+    one with `where`, or a single condition combined with `order_by`.
+    None for a plain single-condition filter.
+    """
+    if cmd.where is not None:
+        return cmd.where.model_dump(mode="json")
+    if cmd.order_by and cmd.field and cmd.operator and cmd.value is not None:
+        return {"logic": "and", "conditions": [
+            {"field": cmd.field, "operator": cmd.operator.value, "value": cmd.value}
+        ]}
+    return None
 
 def execute_command(cmd: DBCommand) -> dict:
     try:
@@ -76,13 +174,17 @@ def execute_command(cmd: DBCommand) -> dict:
                 result = read(cmd.row)
                 return {"status": "success", "result": result}
             else:
-                result = read()
-                return {"status": "success", "result": result}
+                limit = page_size(cmd.limit)
+                result = read(limit=limit, after=cmd.cursor)
+                return {"status": "success", "result": result, "next_cursor": next_cursor(result, limit)}
         
         # UPDATE
         elif cmd.action == Action.update:
             if cmd.row is not None and cmd.field and cmd.value is not None:
-                update(cmd.row, cmd.field, cmd.value)
+                if isinstance(cmd.row, list):
+                    update_many([(row, {cmd.field: cmd.value}) for row in cmd.row])
+                else:
+                    update(cmd.row, cmd.field, cmd.value)
                 return {
                     "status": "success",
                     "message": f"Row {cmd.row} updated: {cmd.field} = {cmd.value}"
@@ -92,6 +194,16 @@ def execute_command(cmd: DBCommand) -> dict:
         
         # CREATE
         elif cmd.action == Action.create:
+            if isinstance(cmd.value, Product):
+                cmd.value = cmd.value.model_dump()
+            if isinstance(cmd.value, list):
+                # Several products: one transaction
+                products = [p.model_dump() if isinstance(p, Product) else p for p in cmd.value]
+                product_ids = create_many(products)
+                return {
+                    "status": "success",
+                    "message": f"{len(product_ids)} products created with IDs {product_ids}"
+                }
             if cmd.value and isinstance(cmd.value, dict):
                 required_fields = ['name', 'category', 'color', 'quantity', 'price']
                 if all(field in cmd.value for field in required_fields):
@@ -115,6 +227,9 @@ def execute_command(cmd: DBCommand) -> dict:
         # DELETE
         elif cmd.action == Action.delete:
             if cmd.row is not None:
+                if isinstance(cmd.row, list):
+                    deleted = delete_many(cmd.row)
+                    return {"status": "success", "message": f"{deleted} rows deleted: {cmd.row}"}
                 delete(cmd.row)
                 return {"status": "success", "message": f"Row {cmd.row} deleted"}
             else:
@@ -122,11 +237,18 @@ def execute_command(cmd: DBCommand) -> dict:
 
         # FILTER
         elif cmd.action == Action.filters:
-            if cmd.field and cmd.operator and cmd.value is not None:
+            where = compound_where(cmd)
+            if where is not None:
+                # Several conditions and/or a sort: one query
+                limit = page_size(cmd.limit)
+                result = compound_filters(where, cmd.order_by, bool(cmd.descending), limit=limit, after=cmd.cursor)
+                return {"status": "success", "result": result, "next_cursor": next_cursor(result, limit, cmd.order_by or 'id')}
+            elif cmd.field and cmd.operator and cmd.value is not None:
                 # Handle operator - check if it's an enum or string
                 operator_str = cmd.operator.value if hasattr(cmd.operator, 'value') else cmd.operator
-                result = filters(cmd.field, operator_str, cmd.value)
-                return {"status": "success", "result": result}
+                limit = page_size(cmd.limit)
+                result = filters(cmd.field, operator_str, cmd.value, limit=limit, after=cmd.cursor)
+                return {"status": "success", "result": result, "next_cursor": next_cursor(result, limit)}
             else:
                 return {"status": "error", "message": "Filtering requires field, operator, and value"}
 
@@ -134,22 +256,32 @@ def execute_command(cmd: DBCommand) -> dict:
         elif cmd.action == Action.sort:
             if cmd.field:
                 # Check if descending sort is requested
-                descending = False
-                if cmd.value and str(cmd.value).lower() in ['desc', 'descending', 'reverse']:
-                    descending = True
-                result = sort(cmd.field, descending)
-                return {"status": "success", "result": result}
+                descending = is_descending(cmd.value)
+                limit = page_size(cmd.limit)
+                result = sort(cmd.field, descending, limit=limit, after=cmd.cursor)
+                return {"status": "success", "result": result, "next_cursor": next_cursor(result, limit, cmd.field)}
             else:
                 return {"status": "error", "message": "Field required for sorting"}
 
         # REPLICATE
         elif cmd.action == Action.replicate:
             if cmd.row is not None:
+                if isinstance(cmd.row, list) or (cmd.count or 1) > 1:
+                    new_ids = replicate_many(cmd.row, cmd.count or 1)
+                    return {"status": "success", "message": f"Row {cmd.row} replicated with new IDs {new_ids}"}
                 new_id = replicate(cmd.row)
                 return {"status": "success", "message": f"Row {cmd.row} replicated with new ID {new_id}"}
             else:
                 return {"status": "error", "message": "Row ID required for replicate"}
         
+        # SEARCH
+        elif cmd.action == Action.search:
+            if cmd.value is not None and str(cmd.value).strip():
+                result = search(str(cmd.value), limit=page_size(cmd.limit))
+                return {"status": "success", "result": result}
+            else:
+                return {"status": "error", "message": "Search requires text in value"}
+        
         # STATISTICS
         elif cmd.action == Action.stats:
             overall = get_overall_stats()
@@ -166,5 +298,48 @@ def execute_command(cmd: DBCommand) -> dict:
             
     except Exception as e:
         return {"status": "error", "message": f"Exception occurred: {str(e)}"}
-	
-	
+
+
+def listing_query(cmd: DBCommand, limit=None):
+    """(query, params) of a read-all/filter/sort command, or None for other commands"""
+    if cmd.action == Action.read and cmd.row is None:
+        return read_query(limit, cmd.cursor)
+    if cmd.action == Action.filters and compound_where(cmd) is not None:
+        return compound_query(compound_where(cmd), cmd.order_by, bool(cmd.descending), limit, cmd.cursor)
+    if cmd.action == Action.filters and cmd.field and cmd.operator and cmd.value is not None:
+        operator_str = cmd.operator.value if hasattr(cmd.operator, 'value') else cmd.operator
+        return filter_query(cmd.field, operator_str, cmd.value, limit, cmd.cursor)
+    if cmd.action == Action.sort and cmd.field:
+        return sort_query(cmd.field, is_descending(cmd.value), limit, cmd.cursor)
+    if cmd.action == Action.search and cmd.value is not None:
+        return search_query(str(cmd.value), limit or page_size(cmd.limit))
+    return None
+
+def stream_command(cmd: DBCommand):
+    """
+    Every row matched by a read-all/filter/sort command, as an iterator of
+    row batches read straight from the SQLite cursor (no page limit).
+    Returns None for commands that don't list products.
+    """
+    query = listing_query(cmd)
+    if query is None:
+        return None
+    return iter_batches(*query)
+
+def explain_command(cmd: DBCommand) -> dict:
+    """EXPLAIN QUERY PLAN of the query a read/filter/sort command would run"""
+    try:
+        if cmd.action == Action.read and cmd.row is not None:
+            if isinstance(cmd.row, list):
+                placeholders = ','.join('?' for _ in cmd.row)
+                query, params = f"SELECT * FROM products WHERE id IN ({placeholders}) ORDER BY id", tuple(cmd.row)
+            else:
+                query, params = "SELECT * FROM products WHERE id = ?", (cmd.row,)
+        else:
+            query = listing_query(cmd, page_size(cmd.limit))
+            if query is None:
+                return {"status": "error", "message": f"No query plan for action: {cmd.action}"}
+            query, params = query
+        return {"status": "success", **explain_query_plan(query, params)}
+    except Exception as e:
+        return {"status": "error", "message": f"Exception occurred: {str(e)}"}
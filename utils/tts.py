@@ -0,0 +1,257 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+# *******************************
+# Text-to-speech backends
+# A backend turns text into encoded audio bytes. gTTS needs network access;
+# pyttsx3 drives the platform's offline speech engine (espeak, SAPI5, NSSpeech).
+
+class GTTSBackend:
+    """Google Translate TTS (network). `voice` is the accent's top-level domain"""
+    name = "gtts"
+    extension = "mp3"
+    mimetype = "audio/mpeg"
+
+    def __init__(self):
+        # gTTS builds the host as translate.google.<tld>: only its known
+        # accents are accepted, never a caller-supplied host
+        from gtts.accents import accents
+        from gtts.lang import tts_langs
+        self.voices = frozenset(accents)
+        self.languages = frozenset(tts_langs())
+
+    def accepts(self, voice, lang="en"):
+        return (voice is None or voice in self.voices) and lang in self.languages
+
+    def synthesize(self, text, lang="en", voice=None):
+        from gtts import gTTS
+        if not self.accepts(voice, lang):
+            raise ValueError(f"Unsupported gTTS language '{lang}' or voice '{voice}'")
+        buffer = io.BytesIO()
+        gTTS(text, lang=lang, tld=voice or "com").write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class Pyttsx3Backend:
+    """Offline synthesis with pyttsx3 (optional dependency). `voice` is an engine voice id"""
+    name = "pyttsx3"
+    extension = "wav"
+    mimetype = "audio/wav"
+
+    def __init__(self):
+        import pyttsx3  # raises ImportError when the offline engine is not installed
+        self._engine = pyttsx3.init()
+        self._lock = threading.Lock()  # the engine is not thread-safe
+        self._default_voice = self._engine.getProperty("voice")
+        voices = self._engine.getProperty("voices")
+        self.voices = frozenset(v.id for v in voices)
+        # Language code -> first voice speaking it, e.g. "en" from espeak's b"\x05en-us"
+        self.languages = {}
+        for v in voices:
+            for code in getattr(v, "languages", None) or ():
+                if isinstance(code, bytes):
+                    code = code.decode("utf-8", "ignore")
+                code = code.strip("\x00\x05 ").replace("_", "-").lower()
+                for key in (code, code.split("-")[0]):
+                    if key:
+                        self.languages.setdefault(key, v.id)
+
+    def accepts(self, voice, lang="en"):
+        if voice is not None and voice not in self.voices:
+            return False
+        # Engines that report no languages only have their default voice to go by
+        return not self.languages or lang.lower() in self.languages
+
+    def synthesize(self, text, lang="en", voice=None):
+        if not self.accepts(voice, lang):
+            raise ValueError(f"Unsupported pyttsx3 language '{lang}' or voice '{voice}'")
+        voice = voice or self.languages.get(lang.lower()) or self._default_voice
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with self._lock:
+                # Set on every call: the engine keeps the previous caller's voice
+                self._engine.setProperty("voice", voice)
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "pyttsx3": Pyttsx3Backend,
+}
+
+
+def make_backend(name):
+    """Instantiate a backend by name, or None when its dependency is missing"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}'. Available: {list(BACKENDS)}")
+    try:
+        return BACKENDS[name]()
+    except Exception as e:  # ImportError, or no speech driver on this machine
+        print(f"❌ TTS backend '{name}' unavailable: {e}")
+        return None
+
+
+# *******************************
+# Content-addressed audio cache
+# Files are named after sha256(backend, lang, voice, text), so a repeated
+# response is served from disk without synthesis. The least recently played
+# files are removed once the cache grows past max_bytes.
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different strings share a cache entry"""
+    return " ".join(str(text).split())
+
+
+class SpeechCache:
+    """
+    - directory: where audio files are stored
+    - max_bytes: total size kept on disk
+    - backends: backends tried in order (e.g. online first, offline fallback)
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, backends=()):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backends = [b for b in backends if b is not None]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._files())
+
+    def key(self, text, lang="en", voice=None, backend=None):
+        backend = backend or (self.backends[0].name if self.backends else "")
+        payload = "\0".join([backend, lang, voice or "", normalize_text(text)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def speak(self, text, lang="en", voice=None):
+        """
+        Path and mimetype of the audio for `text`, synthesizing it on a miss.
+        Returns (path, mimetype, hit).
+        """
+        text = normalize_text(text)
+        if not text:
+            raise ValueError("No text to speak")
+        # Languages and voices are backend-specific: only backends that support both are used
+        backends = [b for b in self.backends if b.accepts(voice, lang)]
+        if not backends:
+            raise ValueError(f"Unsupported language '{lang}' or voice '{voice}'")
+
+        # Any backend's cached rendering will do before synthesizing anew
+        for backend in backends:
+            path = self._path(self.key(text, lang, voice, backend.name), backend.extension)
+            if os.path.exists(path):
+                try:
+                    os.utime(path)  # mark as recently used for eviction
+                except OSError:
+                    continue  # evicted in the meantime
+                with self._lock:
+                    self.hits += 1
+                return path, backend.mimetype, True
+
+        with self._lock:
+            self.misses += 1
+        errors = []
+        for backend in backends:
+            try:
+                audio = backend.synthesize(text, lang, voice)
+            except Exception as e:
+                errors.append(f"{backend.name}: {e}")
+                continue
+            path = self._path(self.key(text, lang, voice, backend.name), backend.extension)
+            self._store(path, audio)
+            return path, backend.mimetype, False
+        raise RuntimeError("Speech synthesis failed (" + "; ".join(errors or ["no backend available"]) + ")")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backends": [b.name for b in self.backends],
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key[:2], f"{key}.{extension}")
+
+    def _store(self, path, audio):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += len(audio)
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+
+    def _files(self):
+        """(path, size, last used) of every cached file"""
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _evict(self, keep):
+        """Remove least recently used files until under max_bytes (lock held)"""
+        files = sorted(self._files(), key=lambda f: f[2])
+        self._size = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if self._size <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+
+def speech_from_env():
+    """
+    Build the cache from TTS_BACKENDS (comma-separated, tried in order),
+    TTS_CACHE_DIR and TTS_CACHE_MAX_MB
+    """
+    names = [n.strip() for n in os.getenv("TTS_BACKENDS", "gtts,pyttsx3").split(",") if n.strip()]
+    return SpeechCache(
+        os.getenv("TTS_CACHE_DIR", "cache/tts"),
+        max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024),
+        backends=[make_backend(name) for name in names],
+    )
+
+
+_speech = None
+_speech_lock = threading.Lock()
+
+def get_speech():
+    """The process-wide speech cache, created on first use"""
+    global _speech
+    if _speech is None:
+        with _speech_lock:
+            if _speech is None:
+                _speech = speech_from_env()
+    return _speech
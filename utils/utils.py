@@ -1,27 +1,240 @@
-from gtts import gTTS
-import whisper
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import shutil
+import numpy as np
+from utils.asr import ASR_BACKEND, load_backend
 
-model = whisper.load_model("base")
+SAMPLE_RATE = 16000  # Whisper's input rate
 
-def transcribe_audio(filepath, lang="en"):
+# *******************************
+# Transcription model registry
+# One model per (backend, size, device) and per process. Models are loaded on
+# first use, or up front through warm_up_models() (e.g. from a worker hook).
+# The engine, threads, beam size and quantization are set in utils/asr.py.
+DEFAULT_MODEL_SIZE = os.getenv("WHISPER_MODEL", "base")
+DEFAULT_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(size=None, device=None, backend=None):
+	"""Return the shared transcription backend for (backend, size, device), loading it once"""
+	key = (backend or ASR_BACKEND, size or DEFAULT_MODEL_SIZE, device or DEFAULT_DEVICE)
+	model = _models.get(key)
+	if model is None:
+		with _models_lock:
+			model = _models.get(key)
+			if model is None:
+				# heavy import (torch / ctranslate2), only paid when a model is needed
+				model = load_backend(key[0], model_size=key[1], device=key[2])
+				_models[key] = model
+	return model
+
+def warm_up_models(sizes=None, device=None):
+	"""Load the given model sizes now instead of on the first request"""
+	for size in sizes or [DEFAULT_MODEL_SIZE]:
+		get_model(size, device)
+
+def _is_mp4(data):
+	"""MP4-family container (m4a, mp4, mov): starts with an ftyp box"""
+	return data[4:8] == b"ftyp"
+
+def _ffmpeg_decode(source, sr, data=None):
+	cmd = [
+		"ffmpeg", "-nostdin", "-threads", "0",
+		"-i", source,
+		"-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr),
+		"pipe:1"
+	]
+	return subprocess.run(cmd, input=data, capture_output=True)
+
+def decode_audio(data, sr=SAMPLE_RATE):
+	"""
+	Decode an encoded recording (webm, mp3, wav, ...) held in memory into
+	mono float32 PCM at `sr` Hz, piping it through ffmpeg (no temp file).
+	ffmpeg cannot seek in a pipe, so MP4-family files (whose index may sit at
+	the end) and anything that fails to decode from the pipe go through a
+	temp file instead.
+	"""
+	proc = None
+	if not _is_mp4(data):
+		proc = _ffmpeg_decode("pipe:0", sr, data)
+	if proc is None or proc.returncode != 0:
+		fd, path = tempfile.mkstemp(suffix=".m4a" if _is_mp4(data) else ".audio")
+		try:
+			with os.fdopen(fd, "wb") as f:
+				f.write(data)
+			proc = _ffmpeg_decode(path, sr)
+		finally:
+			os.remove(path)
+	if proc.returncode != 0:
+		raise RuntimeError(f"Failed to decode audio: {proc.stderr.decode(errors='ignore')[-500:]}")
+	return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+
+# *******************************
+# Voice activity detection
+# Energy-based VAD on 30 ms frames: silence at both ends is cut, long pauses
+# are shortened, and clips with no speech never reach the model. Whisper
+# pads every window to 30 s, so the speech is packed into as few windows as
+# possible, split at pauses rather than mid-word.
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))   # frames quieter than this are silence (dBFS)
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "10"))          # speech is this much louder than the noise floor
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))  # less speech than this: empty recording
+VAD_PAUSE_MS = int(os.getenv("VAD_PAUSE_MS", "300"))            # pauses kept (and padding around speech)
+WINDOW_SECONDS = 30  # Whisper's context window
+
+# Bias decoding toward the app's vocabulary (utils/vocabulary.py)
+DOMAIN_PROMPT = os.getenv("ASR_DOMAIN_PROMPT", "1") == "1"
+
+class NoSpeechDetected(ValueError):
+	"""The recording holds no speech (silence or noise only)"""
+
+_vad_lock = threading.Lock()
+_vad_totals = {"requests": 0, "rejected": 0, "audio_seconds": 0.0, "speech_seconds": 0.0,
+			   "vad_seconds": 0.0, "inference_seconds": 0.0}
+
+def detect_speech(audio, sr=SAMPLE_RATE):
+	"""
+	(start, end) sample ranges of speech in a float32 PCM array.
+	Ranges are padded by VAD_PAUSE_MS and merged when the pause between them
+	is shorter than that.
+	"""
+	frame = sr * VAD_FRAME_MS // 1000
+	count = len(audio) // frame
+	if count == 0:
+		return []
+	frames = audio[:count * frame].reshape(count, frame)
+	energy = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
 	
-	end = filepath.split(".")[-1]
+	# Speech stands out from the noise floor (the quietest frames); steady
+	# background noise does not
+	noise = np.percentile(energy, 10)
+	threshold = max(VAD_THRESHOLD_DB, noise + VAD_MARGIN_DB)
+	voiced = np.flatnonzero(energy > threshold)
+	if len(voiced) * VAD_FRAME_MS < VAD_MIN_SPEECH_MS:
+		return []
 	
-	result = model.transcribe(
-		filepath, 
-		language=lang, 
-		task="transcribe"
-	)
+	pad = max(1, VAD_PAUSE_MS // VAD_FRAME_MS)
+	ranges = []
+	start = end = voiced[0]
+	for index in voiced[1:]:
+		if index - end > 2 * pad:
+			ranges.append((start, end))
+			start = index
+		end = index
+	ranges.append((start, end))
+	return [(max(0, a - pad) * frame, min(count, b + 1 + pad) * frame) for a, b in ranges]
+
+def speech_windows(audio, ranges, sr=SAMPLE_RATE):
+	"""Speech ranges joined into chunks of at most WINDOW_SECONDS, split between ranges"""
+	limit = WINDOW_SECONDS * sr
+	windows, current, length = [], [], 0
+	for start, end in ranges:
+		# A single range longer than a window is cut at window boundaries
+		for offset in range(start, end, limit):
+			piece = audio[offset:min(end, offset + limit)]
+			if current and length + len(piece) > limit:
+				windows.append(np.concatenate(current))
+				current, length = [], 0
+			current.append(piece)
+			length += len(piece)
+	if current:
+		windows.append(np.concatenate(current))
+	return windows
+
+def vad_stats():
+	"""Totals since startup: audio received vs. audio sent to the model, and time spent"""
+	with _vad_lock:
+		totals = dict(_vad_totals)
+	audio_seconds = totals["audio_seconds"]
+	totals["trimmed_ratio"] = round(1 - totals["speech_seconds"] / audio_seconds, 4) if audio_seconds else 0.0
+	return {k: round(v, 3) if isinstance(v, float) else v for k, v in totals.items()}
+
+def transcription_prompt():
+	"""Domain vocabulary prompt, or None when disabled or the database is unavailable"""
+	if not DOMAIN_PROMPT:
+		return None
+	try:
+		from utils.vocabulary import domain_prompt
+		return domain_prompt()
+	except Exception as e:
+		print(f"❌ Vocabulary prompt unavailable: {e}")
+		return None
+
+def transcribe_with_stats(audio, lang="en", model_size=None, device=None, prompt=None):
+	"""
+	transcribe_audio, plus the request's cost:
+	audio and speech seconds, VAD and inference time, windows sent to the model.
+	Raises NoSpeechDetected (without loading the model) for empty recordings.
+	prompt defaults to the domain vocabulary (transcription_prompt).
+	"""
+	if isinstance(audio, str):
+		with open(audio, "rb") as f:
+			audio = f.read()
+	if isinstance(audio, (bytes, bytearray, memoryview)):
+		audio = decode_audio(bytes(audio))
 	
-	#output = filepath[:-len(end)-1] + ".txt"
-	#with open(output, "w") as f:
-	#	f.write(result["text"])
+	started = time.perf_counter()
+	if VAD_ENABLED:
+		windows = speech_windows(audio, detect_speech(audio))
+	else:
+		windows = [audio] if len(audio) else []
+	vad_seconds = time.perf_counter() - started
+	cost = {
+		"audio_seconds": round(len(audio) / SAMPLE_RATE, 3),
+		"speech_seconds": round(sum(len(w) for w in windows) / SAMPLE_RATE, 3),
+		"windows": len(windows),
+		"vad_ms": round(vad_seconds * 1000, 2),
+		"inference_ms": 0.0,
+	}
 	
-	return result["text"]
+	if not windows:
+		_record_vad(cost, rejected=True)
+		raise NoSpeechDetected("No speech detected in the recording")
+	
+	if prompt is None:
+		prompt = transcription_prompt()
+	model = get_model(model_size, device)
+	started = time.perf_counter()
+	texts = [model.transcribe(window, lang, prompt).strip() for window in windows]
+	cost["inference_ms"] = round((time.perf_counter() - started) * 1000, 2)
+	_record_vad(cost)
+	
+	return " ".join(t for t in texts if t), cost
+
+def _record_vad(cost, rejected=False):
+	with _vad_lock:
+		_vad_totals["requests"] += 1
+		_vad_totals["rejected"] += int(rejected)
+		_vad_totals["audio_seconds"] += cost["audio_seconds"]
+		_vad_totals["speech_seconds"] += cost["speech_seconds"]
+		_vad_totals["vad_seconds"] += cost["vad_ms"] / 1000
+		_vad_totals["inference_seconds"] += cost["inference_ms"] / 1000
+
+def transcribe_audio(audio, lang="en", model_size=None, device=None, prompt=None):
+	"""
+	Transcribe a recording given as:
+	- a file path
+	- encoded bytes (decoded in memory with decode_audio)
+	- a float32 PCM array at 16 kHz
+	Returns "" when the recording holds no speech.
+	"""
+	try:
+		return transcribe_with_stats(audio, lang, model_size, device, prompt)[0]
+	except NoSpeechDetected:
+		return ""
 
-def convert_to_audio(text, outpath):
-	tts = gTTS(text, lang="en", tld="com")
-	tts.save(outpath)
+def convert_to_audio(text, outpath, lang="en", voice=None):
+	"""Write the spoken version of `text` to outpath (no synthesis when already cached)"""
+	from utils.tts import get_speech
+	path, _, _ = get_speech().speak(text, lang, voice)
+	shutil.copyfile(path, outpath)
+	return outpath
 
 
 
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from utils.models import Action, CATEGORIES, COLORS
+from db.db import distinct_values, result_cache
+
+# *******************************
+# Domain vocabulary for speech recognition
+# Whisper's initial_prompt biases decoding toward the words it contains, so
+# the prompt lists what a command can say: the actions, the fields, and the
+# categories, colors and product names currently in the database. It is
+# rebuilt after this process writes to the table, and at least every
+# VOCAB_TTL seconds to pick up other workers' writes. Categories and colors
+# come from the materialized stats (cheap); product names need a scan of the
+# table, so they are refreshed on a background thread, at most every
+# VOCAB_NAMES_INTERVAL seconds, and transcriptions use the last list meanwhile.
+VOCAB_TTL = float(os.getenv("VOCAB_TTL", "60"))
+VOCAB_NAMES_INTERVAL = float(os.getenv("VOCAB_NAMES_INTERVAL", "5"))
+# Whisper keeps the last 224 tokens of the prompt; ~4 characters per token
+VOCAB_MAX_CHARS = int(os.getenv("VOCAB_MAX_CHARS", "800"))
+
+FIELD_WORDS = ("id", "name", "category", "color", "quantity", "price")
+
+_lock = threading.Lock()
+_prompt = None
+_built_at = 0.0
+_generation = None
+_prompt_names = None
+
+_names = []
+_names_generation = None
+_names_at = float("-inf")
+_refreshing = False
+
+
+def _unique(values):
+    seen = set()
+    return [v for v in values if not (v.lower() in seen or seen.add(v.lower()))]
+
+
+def build_domain_prompt(max_chars=VOCAB_MAX_CHARS, names=None):
+    """
+    Vocabulary prompt from the schema and the distinct values in the database.
+    names: product names, most common first (read from the table when None)
+    """
+    categories = _unique(list(CATEGORIES) + distinct_values("category"))
+    colors = _unique(list(COLORS) + distinct_values("color"))
+    prompt = (
+        f"Inventory voice commands: {', '.join(action.value for action in Action)}. "
+        f"Fields: {', '.join(FIELD_WORDS)}. "
+        f"Categories: {', '.join(categories)}. "
+        f"Colors: {', '.join(colors)}. "
+        "Delete product 3. Show red furniture under 50 dollars."
+    )
+    if names is None:
+        names = distinct_values("name", limit=200)
+
+    # Product names fill whatever room is left, most common first
+    included = []
+    length = len(prompt) + len(" Products: .")
+    for name in names:
+        if length + len(name) + 2 > max_chars:
+            break
+        included.append(name)
+        length += len(name) + 2
+    if included:
+        prompt += f" Products: {', '.join(included)}."
+    return prompt[:max_chars]
+
+
+def _refresh_names():
+    """Background thread: re-read the product names"""
+    global _names, _names_generation, _names_at, _refreshing
+    generation = result_cache.generation
+    try:
+        names = distinct_values("name", limit=200)
+    except Exception as e:
+        print(f"❌ Vocabulary names refresh failed: {e}")
+        names = None
+    with _lock:
+        if names is not None:
+            _names = names
+            _names_generation = generation
+        _names_at = time.monotonic()
+        _refreshing = False
+
+
+def domain_prompt():
+    """The current vocabulary prompt, rebuilt when the data may have changed"""
+    global _prompt, _built_at, _generation, _prompt_names, _refreshing
+    with _lock:
+        now = time.monotonic()
+        generation = result_cache.generation
+
+        names_stale = _names_generation != generation or now - _names_at > VOCAB_TTL
+        if names_stale and not _refreshing and now - _names_at >= VOCAB_NAMES_INTERVAL:
+            _refreshing = True
+            threading.Thread(target=_refresh_names, name="vocabulary", daemon=True).start()
+
+        stale = (_generation != generation or now - _built_at > VOCAB_TTL
+                 or _prompt_names is not _names)
+        if _prompt is None or stale:
+            _prompt = build_domain_prompt(names=_names)
+            _built_at = now
+            _generation = generation
+            _prompt_names = _names
+        return _prompt